@@ -0,0 +1,34 @@
+# _common.py
+# Helpers shared by the benchmark scripts: JSON result history and the commit a result was measured on.
+import json
+import os
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Function: append_history
+# Description: Append a result to the JSON history file and return the previous entry to compare it with.
+# Params: path (str), result (dict), key (optional result field; the previous entry is the last one with the same
+#   value of it, otherwise simply the last entry).
+def append_history(path, result, key=None):
+    history = []
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            history = json.load(f)
+    previous = next((h for h in reversed(history) if key is None or h.get(key) == result[key]), None)
+    history.append(result)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=2)
+    return previous
+
+
+# Function: git_commit
+# Description: Short hash of the checked-out commit, or None outside a git checkout.
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
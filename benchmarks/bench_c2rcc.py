@@ -0,0 +1,264 @@
+# bench_c2rcc.py
+# Profiling harness of the Resample -> Subset -> C2RCC -> write chain (c2rcc_core), run headlessly with SNAP.
+#
+# Inputs are clipped from a real Sentinel-2 L1C product: for every AOI size class a window of that extent is cut
+# from the centre of the scene (C2RCC needs genuine L1C metadata and geometry, so fully synthetic products are not
+# used). Each combination of the settings matrix (resolution, AOI size, output flags preset, output format, SNAP
+# tile-scheduler parallelism) runs in two measured stages:
+#   resample_subset  read + Resample + Subset, materialised to a temporary BEAM-DIMAP product
+#   c2rcc_write      C2RCC on the materialised subset, written in the chosen format
+# (with --no-materialise the whole chain runs as one "chain" stage, exactly like production).
+# Per stage it records wall time, CPU time and utilisation (all threads of the process, including the JVM), peak
+# JVM heap (memory pool peaks), peak Python allocations (tracemalloc) and bytes written. Results can be appended
+# to a JSON history; runs slower than the previous entry with the same settings by more than --max-regression
+# are reported and make the script exit with 1.
+#
+# Usage:
+#   python benchmarks/bench_c2rcc.py --safe /data/S2A_MSIL1C_...SAFE [--resolutions 10,60] [--sizes small,medium]
+#       [--outputs default,minimal] [--formats BEAM-DIMAP,GeoTIFF] [--workers 1,4] [--repeat 1]
+#       [--history benchmarks/results/c2rcc.json] [--max-regression 0.2]
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import c2rcc_core  # noqa: E402
+from _common import append_history, git_commit  # noqa: E402
+from storage_manager import path_size, get_storage_manager  # noqa: E402
+
+# AOI size classes: edge length (m) of the square window clipped from the scene centre.
+AOI_SIZES = {"small": 5000, "medium": 20000, "large": 60000}
+
+# Output flag presets (merged over c2rcc_core.DEFAULT_OUTPUTS).
+OUTPUT_PRESETS = {
+    "minimal": {name: name == "outputAsRrs" for name in c2rcc_core.DEFAULT_OUTPUTS},
+    "default": {},
+    "all": {name: True for name in c2rcc_core.DEFAULT_OUTPUTS},
+}
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Class: StageMeter
+# Description: Context manager measuring one stage: wall time, process CPU time, peak Python allocations and peak
+#   JVM heap. The JVM peak is the sum of the peak usage of all heap memory pools, reset when the stage starts.
+class StageMeter:
+    def __init__(self, name):
+        self.name = name
+        self.result = {}
+
+    def __enter__(self):
+        self._heap_pools = _heap_pools()
+        for pool in self._heap_pools:
+            pool.resetPeakUsage()
+        tracemalloc.reset_peak()
+        self._cpu = time.process_time()
+        self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        self.result = {
+            "wall_s": round(wall, 3),
+            "cpu_s": round(cpu, 3),
+            "cpu_util": round(cpu / wall / (os.cpu_count() or 1), 3) if wall else None,
+            "py_peak_mb": round(tracemalloc.get_traced_memory()[1] / 1024 ** 2, 1),
+            "jvm_peak_mb": round(sum(pool.getPeakUsage().getUsed() for pool in self._heap_pools) / 1024 ** 2, 1),
+        }
+        return False
+
+
+# Function: _heap_pools
+# Description: Return the JVM heap memory pool MX beans.
+def _heap_pools():
+    ManagementFactory = c2rcc_core.jpy.get_type('java.lang.management.ManagementFactory')
+    MemoryType = c2rcc_core.jpy.get_type('java.lang.management.MemoryType')
+    pools = ManagementFactory.getMemoryPoolMXBeans()
+    return [pools.get(i) for i in range(pools.size()) if pools.get(i).getType() == MemoryType.HEAP]
+
+
+# Function: set_parallelism
+# Description: Set the number of SNAP/JAI tile computation threads (what `gpt -q` sets).
+def set_parallelism(workers):
+    JAI = c2rcc_core.jpy.get_type('javax.media.jai.JAI')
+    JAI.getDefaultInstance().getTileScheduler().setParallelism(int(workers))
+
+
+# Function: written_bytes
+# Description: Size of everything a writer produced for output_path (the file and its .data folder, if any).
+def written_bytes(output_path):
+    folder = os.path.dirname(output_path)
+    prefix = os.path.basename(output_path)
+    return sum(path_size(os.path.join(folder, name)) for name in os.listdir(folder) if name.startswith(prefix))
+
+
+# Function: centre_window
+# Description: Pixel region "x,y,w,h" of a square window of size_m metres in the centre of a product.
+def centre_window(product, size_m, resolution):
+    width, height = product.getSceneRasterWidth(), product.getSceneRasterHeight()
+    edge = max(1, int(size_m / resolution))
+    w, h = min(edge, width), min(edge, height)
+    return f"{(width - w) // 2},{(height - h) // 2},{w},{h}"
+
+
+# Function: subset_region
+# Description: Subset a product to a pixel region, keeping the metadata C2RCC needs.
+def subset_region(product, region):
+    params = c2rcc_core.HashMap()
+    params.put('region', region)
+    params.put('copyMetadata', True)
+    return c2rcc_core.GPF.createProduct('Subset', params, product)
+
+
+# Function: run_case
+# Description: Run and measure one combination of the settings matrix.
+# Returns: dict with the settings, per-stage measurements and totals.
+def run_case(safe_path, work_dir, resolution, size, outputs_preset, format_name, workers, materialise, log):
+    set_parallelism(workers)
+    outputs = dict(c2rcc_core.DEFAULT_OUTPUTS, **OUTPUT_PRESETS[outputs_preset])
+    case_dir = tempfile.mkdtemp(prefix="case_", dir=work_dir)
+    output_path = os.path.join(case_dir, "c2rcc")
+    stages = {}
+    try:
+        if materialise:
+            with StageMeter("resample_subset") as meter:
+                resampled = c2rcc_core.read_resampled(safe_path, log, resolution)
+                subset = subset_region(resampled, centre_window(resampled, AOI_SIZES[size], resolution))
+                subset_path = os.path.join(case_dir, "subset")
+                c2rcc_core.write_product(subset, subset_path, log)
+            stages["resample_subset"] = dict(meter.result, bytes_written=written_bytes(subset_path))
+            raster = f"{subset.getSceneRasterWidth()}x{subset.getSceneRasterHeight()}"
+            resampled.dispose()
+            subset.dispose()
+
+            with StageMeter("c2rcc_write") as meter:
+                source = c2rcc_core.ProductIO.readProduct(subset_path + ".dim")
+                product_c2rcc = c2rcc_core.run_c2rcc(source, outputs, log)
+                c2rcc_core.write_product(product_c2rcc, output_path, log, format_name=format_name)
+            stages["c2rcc_write"] = dict(meter.result, bytes_written=written_bytes(output_path))
+            source.dispose()
+        else:
+            with StageMeter("chain") as meter:
+                resampled = c2rcc_core.read_resampled(safe_path, log, resolution)
+                subset = subset_region(resampled, centre_window(resampled, AOI_SIZES[size], resolution))
+                product_c2rcc = c2rcc_core.run_c2rcc(subset, outputs, log)
+                c2rcc_core.write_product(product_c2rcc, output_path, log, format_name=format_name)
+            stages["chain"] = dict(meter.result, bytes_written=written_bytes(output_path))
+            raster = f"{subset.getSceneRasterWidth()}x{subset.getSceneRasterHeight()}"
+            resampled.dispose()
+    finally:
+        shutil.rmtree(case_dir, ignore_errors=True)
+
+    return {
+        "settings": {"resolution": resolution, "size": size, "outputs": outputs_preset, "format": format_name,
+                     "workers": workers, "materialise": materialise},
+        "raster": raster,
+        "stages": stages,
+        "wall_s": round(sum(stage["wall_s"] for stage in stages.values()), 3),
+        "cpu_s": round(sum(stage["cpu_s"] for stage in stages.values()), 3),
+        "jvm_peak_mb": max(stage["jvm_peak_mb"] for stage in stages.values()),
+        "py_peak_mb": max(stage["py_peak_mb"] for stage in stages.values()),
+        "bytes_written": sum(stage["bytes_written"] for stage in stages.values()),
+    }
+
+
+# Function: find_regressions
+# Description: Compare runs with the runs of the previous entry that have the same settings.
+# Returns: list of (settings, previous wall_s, current wall_s) slower by more than max_regression (fraction).
+def find_regressions(previous, result, max_regression):
+    key = lambda run: json.dumps(run["settings"], sort_keys=True)
+    before = {key(run): run for run in previous["runs"]}
+    regressions = []
+    for run in result["runs"]:
+        old = before.get(key(run))
+        if old and old["wall_s"] and run["wall_s"] > old["wall_s"] * (1 + max_regression):
+            regressions.append((run["settings"], old["wall_s"], run["wall_s"]))
+    return regressions
+
+
+def _csv(value, cast=str):
+    return [cast(item) for item in value.split(",") if item]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile the C2RCC chain on clipped L1C inputs.")
+    parser.add_argument("--safe", required=True, help="Sentinel-2 L1C .SAFE folder the inputs are clipped from.")
+    parser.add_argument("--resolutions", default="60", help=f"Comma separated, from {c2rcc_core.RESOLUTIONS}.")
+    parser.add_argument("--sizes", default="small", help=f"Comma separated AOI sizes: {', '.join(AOI_SIZES)}.")
+    parser.add_argument("--outputs", default="default", help=f"Output presets: {', '.join(OUTPUT_PRESETS)}.")
+    parser.add_argument("--formats", default=c2rcc_core.DEFAULT_FORMAT, help="Comma separated SNAP writers.")
+    parser.add_argument("--workers", default=str(os.cpu_count() or 1), help="Comma separated tile parallelism.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per combination.")
+    parser.add_argument("--no-materialise", action="store_true",
+                        help="Run the chain as one stage instead of materialising the subset.")
+    parser.add_argument("--work-dir", help="Folder for temporary products (default: system temp).")
+    parser.add_argument("--history", help="JSON file to append the result to.")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="Allowed slowdown against the previous history entry (fraction).")
+    parser.add_argument("--verbose", action="store_true", help="Print the SNAP/C2RCC log messages.")
+    args = parser.parse_args(argv)
+
+    unknown = [size for size in _csv(args.sizes) if size not in AOI_SIZES]
+    unknown += [preset for preset in _csv(args.outputs) if preset not in OUTPUT_PRESETS]
+    if unknown:
+        parser.error(f"unknown values: {', '.join(unknown)}")
+
+    def log(message, level=None):
+        if args.verbose:
+            print(f"    {message}")
+
+    c2rcc_core.init_snap(log)
+    get_storage_manager().configure(min_free_bytes=0)
+    tracemalloc.start()
+    work_dir = tempfile.mkdtemp(prefix="bench_c2rcc_", dir=args.work_dir)
+    runs = []
+    try:
+        matrix = itertools.product(_csv(args.resolutions, int), _csv(args.sizes), _csv(args.outputs),
+                                   _csv(args.formats), _csv(args.workers, int))
+        for resolution, size, outputs_preset, format_name, workers in matrix:
+            for _ in range(args.repeat):
+                run = run_case(args.safe, work_dir, resolution, size, outputs_preset, format_name, workers,
+                               not args.no_materialise, log)
+                runs.append(run)
+                stages = ", ".join(f"{name} {stage['wall_s']} s" for name, stage in run["stages"].items())
+                print(f"{resolution:>2} m {size:<6} {outputs_preset:<7} {format_name:<10} workers {workers:>2} "
+                      f"[{run['raster']}]: {run['wall_s']} s ({stages}), CPU {run['cpu_s']} s, "
+                      f"JVM {run['jvm_peak_mb']} MB, Python {run['py_peak_mb']} MB, "
+                      f"written {run['bytes_written'] / 1024 ** 2:.1f} MB")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    Runtime = c2rcc_core.jpy.get_type('java.lang.Runtime')
+    result = {
+        "benchmark": "c2rcc",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "jvm_max_heap_mb": round(Runtime.getRuntime().maxMemory() / 1024 ** 2),
+        "commit": git_commit(),
+        "input": os.path.basename(os.path.normpath(args.safe)),
+        "runs": runs,
+    }
+    if args.history:
+        previous = append_history(args.history, result, key="input")
+        if previous:
+            regressions = find_regressions(previous, result, args.max_regression)
+            for settings, before, now in regressions:
+                print(f"regression vs {previous.get('commit')}: {settings} {before} s -> {now} s")
+            if regressions:
+                return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+# bench_downloader.py
+# Offline throughput benchmark of the CDSE client (token, paged search, downloads) against the local stand-in
+# server benchmarks/mock_cdse.py, so no live Copernicus service or credentials are needed.
+#
+# For every concurrency setting the whole catalogue is downloaded through a fresh JobScheduler with that many
+# network workers, exactly as the GUI/CLI do. Reports products/hour, MB/s, per-product latency percentiles
+# (p50/p95/p99), search time and the server-side counters (429 responses, resumed transfers). Results can be
+# appended to a JSON history to compare commits.
+#
+# Usage:
+#   python benchmarks/bench_downloader.py [--concurrency 1,2,4,8] [--products 20] [--size-mb 5]
+#                                         [--bandwidth-mbps 10] [--latency-ms 50] [--throttle-rate 0.05]
+#                                         [--drop-rate 0.05] [--history benchmarks/results/downloader.json]
+import argparse
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import cdse_client  # noqa: E402
+from _common import append_history, git_commit  # noqa: E402
+from job_engine import JobScheduler, JobGroup, NETWORK, DONE  # noqa: E402
+from storage_manager import get_storage_manager  # noqa: E402
+from mock_cdse import MockCDSE, MockConfig  # noqa: E402
+
+
+# Function: percentile
+# Description: Return the p-th percentile (0-100) of the values using linear interpolation.
+def percentile(values, p):
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+# Function: wait_for_group
+# Description: Close the group and block until all of its jobs are finished.
+def wait_for_group(group):
+    finished = threading.Event()
+    group.on_finished = lambda _: finished.set()
+    group.close()
+    finished.wait()
+
+
+# Function: run_once
+# Description: Search and download the whole mock catalogue with the given number of parallel downloads.
+# Returns: dict with the measurements of the run.
+def run_once(mock, concurrency, shapefile):
+    mock.reset_stats()
+    folder = tempfile.mkdtemp(prefix="bench_downloader_")
+    log = lambda message, level=None: None
+    try:
+        started = time.perf_counter()
+        token = cdse_client.get_keycloak_token("bench", "bench")
+        token_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        products = cdse_client.search_products(token, shapefile, "2024-06-01", "2024-06-30", 100, "Level-1C", log)
+        search_s = time.perf_counter() - started
+
+        def download(job, product):
+            return cdse_client.download_product(token, product, folder, job, log)
+
+        scheduler = JobScheduler({NETWORK: concurrency})
+        try:
+            group = JobGroup("bench")
+            started = time.perf_counter()
+            for product in products:
+                scheduler.submit(product["Name"], download, product, resource=NETWORK, group=group)
+            wait_for_group(group)
+            wall_s = time.perf_counter() - started
+        finally:
+            scheduler.shutdown()
+
+        durations = [job.finished_at - job.started_at for job in group.jobs if job.state == DONE]
+        done = group.count(DONE)
+        total_bytes = sum(os.path.getsize(job.result) for job in group.jobs if job.state == DONE)
+        errors = sorted({str(job.error) for job in group.jobs if job.error is not None})
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    return {
+        "concurrency": concurrency,
+        "products": len(products),
+        "done": done,
+        "failed": len(products) - done,
+        "errors": errors[:5],
+        "token_s": round(token_s, 3),
+        "search_s": round(search_s, 3),
+        "download_wall_s": round(wall_s, 3),
+        "products_per_hour": round(done / wall_s * 3600, 1) if wall_s else None,
+        "mb_per_s": round(total_bytes / 1024 ** 2 / wall_s, 2) if wall_s else None,
+        "latency_p50_s": _round(percentile(durations, 50)),
+        "latency_p95_s": _round(percentile(durations, 95)),
+        "latency_p99_s": _round(percentile(durations, 99)),
+        "latency_max_s": _round(max(durations) if durations else None),
+        "server": dict(mock.stats),
+    }
+
+
+# Function: write_aoi
+# Description: Write a minimal WGS84 polygon shapefile (.shp/.shx/.prj) used as the search AOI.
+def write_aoi(folder):
+    import struct
+    points = [(14.0, 49.0), (14.0, 49.5), (14.5, 49.5), (14.5, 49.0), (14.0, 49.0)]
+    content = struct.pack("<i4d2i", 5, 14.0, 49.0, 14.5, 49.5, 1, len(points)) + struct.pack("<i", 0)
+    content += b"".join(struct.pack("<2d", *point) for point in points)
+    header = lambda length: (struct.pack(">7i", 9994, 0, 0, 0, 0, 0, length // 2)
+                             + struct.pack("<2i4d4d", 1000, 5, 14.0, 49.0, 14.5, 49.5, 0, 0, 0, 0))
+    record = struct.pack(">2i", 1, len(content) // 2) + content
+    path = os.path.join(folder, "aoi.shp")
+    with open(path, "wb") as f:
+        f.write(header(100 + len(record)) + record)
+    with open(os.path.join(folder, "aoi.shx"), "wb") as f:
+        f.write(header(108) + struct.pack(">2i", 50, len(content) // 2))
+    with open(os.path.join(folder, "aoi.prj"), "w") as f:
+        f.write('GEOGCS["GCS_WGS_1984",DATUM["D_WGS_1984",SPHEROID["WGS_1984",6378137.0,298.257223563]],'
+                'PRIMEM["Greenwich",0.0],UNIT["Degree",0.0174532925199433]]')
+    return path
+
+
+def _round(value, digits=3):
+    return None if value is None else round(value, digits)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark search/download throughput against a local mock CDSE.")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="Comma separated numbers of parallel downloads.")
+    parser.add_argument("--products", type=int, default=20, help="Products in the mock catalogue.")
+    parser.add_argument("--size-mb", type=float, default=5.0, help="Size of every product .zip.")
+    parser.add_argument("--page-size", type=int, default=20, help="Max products per catalogue page.")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Server delay before every response.")
+    parser.add_argument("--bandwidth-mbps", type=float, default=10.0, help="MB/s per connection (0 = unlimited).")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of requests answered with 429.")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After (s) of 429 responses.")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Share of transfers cut off mid-way.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of throttling/drops.")
+    parser.add_argument("--token-ttl", type=float, default=600.0, help="Access token lifetime (s) of the mock.")
+    parser.add_argument("--history", help="JSON file to append the result to.")
+    args = parser.parse_args(argv)
+
+    config = MockConfig(args.products, args.size_mb, args.page_size, args.latency_ms, args.bandwidth_mbps,
+                        args.throttle_rate, args.retry_after, args.drop_rate, args.seed, args.token_ttl)
+    mock = MockCDSE(config)
+    mock.start()
+    cdse_client.configure_endpoints(mock.token_url, mock.catalogue_url)
+    get_storage_manager().configure(min_free_bytes=0)
+    aoi_folder = tempfile.mkdtemp(prefix="bench_aoi_")
+    runs = []
+    try:
+        shapefile = write_aoi(aoi_folder)
+        for concurrency in [int(c) for c in args.concurrency.split(",") if c]:
+            run = run_once(mock, concurrency, shapefile)
+            runs.append(run)
+            print(f"concurrency {concurrency:>2}: {run['done']}/{run['products']} products, "
+                  f"{run['products_per_hour']} products/h, {run['mb_per_s']} MB/s, "
+                  f"latency p50 {run['latency_p50_s']} s p95 {run['latency_p95_s']} s p99 {run['latency_p99_s']} s, "
+                  f"search {run['search_s']} s ({run['server']['pages']} pages), "
+                  f"429 {run['server']['throttled']}, resumed {run['server']['range_requests']}")
+            for error in run["errors"]:
+                print(f"    error: {error}")
+    finally:
+        mock.stop()
+        shutil.rmtree(aoi_folder, ignore_errors=True)
+
+    result = {
+        "benchmark": "downloader",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "commit": git_commit(),
+        "server": config.as_dict(),
+        "runs": runs,
+    }
+    if args.history:
+        previous = append_history(args.history, result)
+        if previous:
+            best = lambda r: max((run["mb_per_s"] or 0 for run in r["runs"]), default=0)
+            print(f"previous ({previous.get('commit')}): best {best(previous)} MB/s, now {best(result)} MB/s")
+    return 1 if any(run["failed"] for run in runs) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
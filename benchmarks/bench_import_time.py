@@ -0,0 +1,108 @@
+# bench_import_time.py
+# Import-time benchmark of the application start-up.
+#
+# Imports the given module (default: main_app) in fresh interpreters with `python -X importtime`,
+# reports the median total import time, the slowest modules and any heavy dependency that was loaded
+# eagerly (geopandas, shapely, requests, esa_snappy, ...). Results can be appended to a JSON history
+# to track start-up time over commits.
+#
+# Usage:
+#   python benchmarks/bench_import_time.py [--module main_app] [--repeat 5] [--max-ms 1500]
+#                                          [--history benchmarks/results/import_time.json]
+import argparse
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from _common import append_history, git_commit
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages that must not be imported during application start-up (loaded lazily on first use).
+HEAVY_MODULES = ("geopandas", "shapely", "pyproj", "pandas", "numpy", "requests", "esa_snappy", "jpy")
+
+
+# Function: measure_once
+# Description: Import the module in a fresh interpreter and parse the -X importtime report.
+# Returns: (total_us, {module: cumulative_us}).
+def measure_once(module):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_DIR, capture_output=True, text=True,
+        env=dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [p.strip() for p in line[len("import time:"):].split("|")]
+        if not parts[0].isdigit():
+            continue  # header line
+        cumulative[parts[2].strip()] = int(parts[1])
+    return cumulative.get(module, sum(cumulative.values())), cumulative
+
+
+# Function: run_benchmark
+# Description: Repeat the measurement and summarise it.
+def run_benchmark(module, repeat, top):
+    totals = []
+    last = {}
+    for _ in range(repeat):
+        total, last = measure_once(module)
+        totals.append(total)
+    loaded_heavy = sorted({name.split(".")[0] for name in last} & set(HEAVY_MODULES))
+    slowest = sorted(last.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "module": module,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "commit": git_commit(),
+        "repeat": repeat,
+        "median_ms": round(statistics.median(totals) / 1000, 1),
+        "min_ms": round(min(totals) / 1000, 1),
+        "max_ms": round(max(totals) / 1000, 1),
+        "heavy_modules_loaded": loaded_heavy,
+        "slowest": [{"module": name, "cumulative_ms": round(us / 1000, 1)} for name, us in slowest],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure application import (start-up) time.")
+    parser.add_argument("--module", default="main_app", help="Module to import (default: main_app).")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of fresh-interpreter runs.")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest modules to report.")
+    parser.add_argument("--max-ms", type=float, help="Fail (exit 1) if the median exceeds this limit.")
+    parser.add_argument("--history", help="JSON file to append the result to.")
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(args.module, args.repeat, args.top)
+    print(f"import {result['module']}: median {result['median_ms']} ms "
+          f"(min {result['min_ms']}, max {result['max_ms']}, n={result['repeat']})")
+    for item in result["slowest"]:
+        print(f"  {item['cumulative_ms']:>9.1f} ms  {item['module']}")
+
+    if args.history:
+        previous = append_history(args.history, result, key="module")
+        if previous:
+            print(f"previous ({previous.get('commit')}): {previous['median_ms']} ms, "
+                  f"change {result['median_ms'] - previous['median_ms']:+.1f} ms")
+
+    failed = False
+    if result["heavy_modules_loaded"]:
+        print(f"heavy modules loaded at start-up: {', '.join(result['heavy_modules_loaded'])}")
+        failed = True
+    if args.max_ms is not None and result["median_ms"] > args.max_ms:
+        print(f"median {result['median_ms']} ms exceeds limit {args.max_ms} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,354 @@
+# mock_cdse.py
+# Local stand-in for the Copernicus Data Space Ecosystem used by the offline benchmarks.
+#
+# Emulates the parts of CDSE the downloader talks to:
+#   POST /auth/token                     Keycloak password / refresh_token grant (returns a bearer token)
+#   GET  /odata/v1/Products?...          OData catalogue with $top/$skip paging and @odata.nextLink
+#   GET  /odata/v1/Products(<id>)/$value 307 redirect to the download host (like zipper.dataspace...)
+#   GET  /download/<id>                  product .zip with Range support
+# Access tokens expire after token_ttl s (refresh tokens after 6x as long); expired tokens are answered with 401.
+# Every request can be delayed (latency), answered with 429 + Retry-After (throttling), downloads are paced to a
+# per-connection bandwidth and can be cut off mid-transfer (drop rate) to exercise resume.
+# The $filter of catalogue queries is ignored: every query returns the whole synthetic catalogue.
+#
+# Usage (standalone, e.g. to point the GUI at it):
+#   python benchmarks/mock_cdse.py --port 8765 --products 50 --size-mb 20 --bandwidth-mbps 10
+#   CDSE_TOKEN_URL=http://127.0.0.1:8765/auth/token CDSE_CATALOGUE_URL=http://127.0.0.1:8765/odata/v1 python main_app.py
+import argparse
+import functools
+import io
+import json
+import random
+import re
+import threading
+import time
+import uuid
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, urlencode
+
+TOKEN_PATH = "/auth/token"
+CATALOGUE_PATH = "/odata/v1"
+DOWNLOAD_PATH = "/download/"
+SEND_CHUNK_SIZE = 64 * 1024
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Class: MockConfig
+# Description: Behaviour of the stand-in server.
+class MockConfig:
+    # Function: __init__
+    # Params: products (int, catalogue size), size_mb (float, size of every product .zip), page_size (int, max
+    #   products per catalogue page), latency_ms (float, delay before every response), bandwidth_mbps (float, MB/s
+    #   per connection, 0 = unlimited), throttle_rate (float 0-1, share of requests answered with 429),
+    #   retry_after (int, seconds in the Retry-After header), drop_rate (float 0-1, share of downloads cut off
+    #   mid-transfer), seed (int, random seed for repeatable runs), token_ttl (float, lifetime of access tokens in s).
+    def __init__(self, products=20, size_mb=5.0, page_size=20, latency_ms=50.0, bandwidth_mbps=0.0,
+                 throttle_rate=0.0, retry_after=1, drop_rate=0.0, seed=0, token_ttl=600.0):
+        self.products = products
+        self.size_mb = size_mb
+        self.page_size = page_size
+        self.latency_ms = latency_ms
+        self.bandwidth_mbps = bandwidth_mbps
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.drop_rate = drop_rate
+        self.seed = seed
+        self.token_ttl = token_ttl
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+# Function: product_name
+# Description: Sentinel-2 L1C name of the i-th synthetic product (pairs of tiles share a datatake).
+def product_name(i):
+    day = 1 + (i // 2) % 28
+    tile = ("33UVR", "33UWR")[i % 2]
+    orbit = 22 + (i // 56)
+    return f"S2A_MSIL1C_202406{day:02d}T100031_N0510_R{orbit:03d}_T{tile}_202406{day:02d}T120000.SAFE"
+
+
+# Function: build_zip
+# Description: Build the .zip of a product: a .SAFE folder with metadata and a stored (uncompressed) payload,
+#   so the archive is valid and has (almost) exactly the requested size.
+@functools.lru_cache(maxsize=8)
+def build_zip(name, payload_bytes):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as zf:
+        zf.writestr(f"{name}/MTD_MSIL1C.xml", "<n1:Level-1C_User_Product/>")
+        zf.writestr(f"{name}/GRANULE/payload.bin", bytes(payload_bytes))
+    return buffer.getvalue()
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Class: MockCDSE
+# Description: Threaded HTTP server emulating CDSE; start() returns the base URL, stats counts the traffic.
+class MockCDSE:
+    # Function: __init__
+    # Params: config (MockConfig), host (str), port (int, 0 = any free port).
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.config = config or MockConfig()
+        self.host = host
+        self.port = port
+        self.server = None
+        self.thread = None
+        self._random = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._tokens = {}
+        self.stats = {}
+        self.reset_stats()
+        # All product names have the same length, so every .zip has the size of the first one.
+        self.payload_bytes = max(0, int(self.config.size_mb * 1024 ** 2) - 1024)
+        zip_size = len(build_zip(product_name(0), self.payload_bytes))
+        self.products = [{
+            "Id": str(uuid.UUID(int=i + 1)),
+            "Name": product_name(i),
+            "ContentLength": zip_size,
+            "ContentDate": {"Start": f"2024-06-{1 + (i // 2) % 28:02d}T10:00:31.000Z"},
+            "Online": True,
+            "Assets": [],
+        } for i in range(self.config.products)]
+        self.by_id = {product["Id"]: product for product in self.products}
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def token_url(self):
+        return self.base_url + TOKEN_PATH
+
+    @property
+    def catalogue_url(self):
+        return self.base_url + CATALOGUE_PATH
+
+    # Function: start
+    # Description: Start serving in a daemon thread and return the base URL.
+    def start(self):
+        handler = functools.partial(_Handler, self)
+        self.server = ThreadingHTTPServer((self.host, self.port), handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self.base_url
+
+    # Function: stop
+    # Description: Shut the server down.
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    # Function: reset_stats
+    # Description: Zero the traffic counters (e.g. between benchmark runs).
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {"requests": 0, "tokens": 0, "refreshes": 0, "rejected": 0, "pages": 0, "redirects": 0, "downloads": 0,
+                          "range_requests": 0, "throttled": 0, "dropped": 0, "bytes_sent": 0}
+
+    # Function: issue_tokens
+    # Description: Issue a new access/refresh token pair; returns the token endpoint response.
+    def issue_tokens(self):
+        ttl = self.config.token_ttl
+        access, refresh = f"mock-access-{uuid.uuid4().hex}", f"mock-refresh-{uuid.uuid4().hex}"
+        with self._lock:
+            now = time.monotonic()
+            self._tokens[access] = now + ttl
+            self._tokens[refresh] = now + 6 * ttl
+        return {"access_token": access, "expires_in": ttl, "refresh_token": refresh, "refresh_expires_in": 6 * ttl,
+                "token_type": "Bearer"}
+
+    # Function: token_valid
+    # Description: True if the token was issued by this server and has not expired or been revoked.
+    def token_valid(self, token):
+        with self._lock:
+            return time.monotonic() < self._tokens.get(token, 0)
+
+    # Function: revoke_tokens
+    # Description: Invalidate every issued token (like a server-side session logout).
+    def revoke_tokens(self):
+        with self._lock:
+            self._tokens.clear()
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.stats[name] += value
+
+    def chance(self, rate):
+        with self._lock:
+            return rate > 0 and self._random.random() < rate
+
+    def product_zip(self, product):
+        return build_zip(product["Name"], self.payload_bytes)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Class: _Handler
+# Description: Request handler of MockCDSE (one instance per request).
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def __init__(self, mock, *args, **kwargs):
+        self.mock = mock
+        super().__init__(*args, **kwargs)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if not self._begin():
+            return
+        if urlsplit(self.path).path != TOKEN_PATH:
+            return self._send_json(404, {"error": "not_found"})
+        form = parse_qs(body.decode())
+        if form.get("grant_type") == ["refresh_token"]:
+            if not self.mock.token_valid(form.get("refresh_token", [""])[0]):
+                return self._send_json(400, {"error": "invalid_grant"})
+            self.mock.count("refreshes")
+        elif not form.get("username") or not form.get("password"):
+            return self._send_json(401, {"error": "invalid_grant"})
+        self.mock.count("tokens")
+        self._send_json(200, self.mock.issue_tokens())
+
+    def do_GET(self):
+        if not self._begin():
+            return
+        url = urlsplit(self.path)
+        authorization = self.headers.get("Authorization", "")
+        if not (authorization.startswith("Bearer ") and self.mock.token_valid(authorization[len("Bearer "):])):
+            self.mock.count("rejected")
+            return self._send_json(401, {"error": "unauthorized"})
+        if url.path == CATALOGUE_PATH + "/Products":
+            return self._products_page(url)
+        match = re.fullmatch(re.escape(CATALOGUE_PATH) + r"/Products\(([^)]+)\)/\$value", url.path)
+        if match and match.group(1) in self.mock.by_id:
+            self.mock.count("redirects")
+            self.send_response(307)
+            self.send_header("Location", self.mock.base_url + DOWNLOAD_PATH + match.group(1))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if url.path.startswith(DOWNLOAD_PATH) and url.path[len(DOWNLOAD_PATH):] in self.mock.by_id:
+            return self._download(self.mock.by_id[url.path[len(DOWNLOAD_PATH):]])
+        self._send_json(404, {"error": "not_found"})
+
+    # Function: _begin
+    # Description: Common request prologue: count, apply latency and throttling. Returns False if answered 429.
+    def _begin(self):
+        config = self.mock.config
+        self.mock.count("requests")
+        if config.latency_ms:
+            time.sleep(config.latency_ms / 1000)
+        if self.mock.chance(config.throttle_rate):
+            self.mock.count("throttled")
+            self.send_response(429)
+            self.send_header("Retry-After", str(config.retry_after))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return False
+        return True
+
+    def _products_page(self, url):
+        query = parse_qs(url.query, keep_blank_values=True)
+        top = min(int(query.get("$top", ["20"])[0]), self.mock.config.page_size)
+        skip = int(query.get("$skip", ["0"])[0])
+        page = {"value": self.mock.products[skip:skip + top]}
+        if query.get("$count", [""])[0].lower() == "true":
+            page["@odata.count"] = len(self.mock.products)
+        if skip + top < len(self.mock.products):
+            next_query = {key: values[0] for key, values in query.items()}
+            next_query["$skip"] = str(skip + top)
+            page["@odata.nextLink"] = f"{self.mock.base_url}{url.path}?{urlencode(next_query)}"
+        self.mock.count("pages")
+        self._send_json(200, page)
+
+    def _download(self, product):
+        data = self.mock.product_zip(product)
+        start, end = 0, len(data) - 1
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match:
+            self.mock.count("range_requests")
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else end
+            if start >= len(data):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(data)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        else:
+            self.mock.count("downloads")
+            self.send_response(200)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+
+        config = self.mock.config
+        stop = end + 1
+        if self.mock.chance(config.drop_rate):
+            self.mock.count("dropped")
+            stop = start + (end - start + 1) // 2
+            self.close_connection = True
+        rate = config.bandwidth_mbps * 1024 ** 2
+        started = time.monotonic()
+        sent = 0
+        try:
+            for offset in range(start, stop, SEND_CHUNK_SIZE):
+                chunk = data[offset:min(offset + SEND_CHUNK_SIZE, stop)]
+                self.wfile.write(chunk)
+                sent += len(chunk)
+                if rate:
+                    ahead = sent / rate - (time.monotonic() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        self.mock.count("bytes_sent", sent)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in CDSE server (token, OData catalogue, downloads).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--products", type=int, default=20)
+    parser.add_argument("--size-mb", type=float, default=5.0)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--bandwidth-mbps", type=float, default=0.0, help="MB/s per connection (0 = unlimited).")
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--token-ttl", type=float, default=600.0, help="Access token lifetime in seconds.")
+    args = parser.parse_args(argv)
+
+    config = MockConfig(args.products, args.size_mb, args.page_size, args.latency_ms, args.bandwidth_mbps,
+                        args.throttle_rate, args.retry_after, args.drop_rate, args.seed, args.token_ttl)
+    mock = MockCDSE(config, args.host, args.port)
+    mock.start()
+    print(f"CDSE_TOKEN_URL={mock.token_url}")
+    print(f"CDSE_CATALOGUE_URL={mock.catalogue_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        mock.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,503 @@
+# c2rcc_core.py
+# Qt-free C2RCC processing of Sentinel-2 L1C products with ESA SNAP (esa_snappy).
+# Used by C2RCCProcessorGUI, the download/process pipeline and the headless CLI (sen2tools_cli.py).
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import zipfile
+
+from log_util import default_log
+
+_log = default_log("sen2tools.c2rcc")
+
+# SNAP cesta
+sys.path.append('C:\\Users\\rybar\\.snap\\snap-python')
+
+# C2RCC output flags (operator parameter -> default), in the order shown in the GUI.
+DEFAULT_OUTPUTS = {
+    "outputAsRrs": True,
+    "outputAcReflectance": True,
+    "outputIop": True,
+    "outputIopBio": True,
+    "outputKd": True,
+    "outputUncertainties": False,
+    "outputTotalConc": True,
+}
+
+# Fixed C2RCC MSI operator parameters (recorded in the output catalogue with the output flags).
+C2RCC_PARAMETERS = {
+    "salinity": "35.0",
+    "temperature": "15.0",
+    "ozone": "330",
+    "press": "1013",
+}
+
+# Target resolutions (m) offered for resampling; 60 m is the triage (preview) tier, ~36x fewer pixels than 10 m.
+RESOLUTIONS = (10, 20, 60)
+DEFAULT_RESOLUTION = 10
+TRIAGE_RESOLUTION = 60
+# Triage: a pixel counts as usable if C2RCC accepted it as water and found no cloud risk / out-of-range TOA input
+# (ice, haze, clouds and strong glint typically fail). A scene passes if at least this fraction of the AOI is usable.
+TRIAGE_VALID_EXPRESSION = "c2rcc_flags.Valid_PE && !c2rcc_flags.Cloud_risk && !c2rcc_flags.Rtosa_OOR"
+DEFAULT_MIN_VALID_FRACTION = 0.1
+# Name of the AOI polygon mask added by add_aoi_mask (usable in band maths expressions).
+AOI_MASK_NAME = "aoi"
+
+# SNAP writer of the C2RCC outputs.
+DEFAULT_FORMAT = "BEAM-DIMAP"
+
+# Prefix of the temporary folders products are extracted/written into before they are moved to their final names.
+TEMP_PREFIX = ".sen2tools_tmp_"
+
+_snap_lock = threading.Lock()
+_snap_initialized = False
+
+
+# Function: init_snap
+# Description: Initialize the SNAP Java gateway and required modules once per process.
+# Params: log (optional callable for status messages).
+def init_snap(log=None):
+    global _snap_initialized, ProductIO, GPF, HashMap, jpy, ProductUtils, File, ProgressMonitor
+    log = log or _log
+    with _snap_lock:
+        if _snap_initialized:
+            return
+        log("🛠️ Inicializuji SNAP prostředí...", logging.DEBUG)
+        from esa_snappy import ProductIO, GPF, HashMap, jpy, ProductUtils
+        File = jpy.get_type('java.io.File')
+        ProgressMonitor = jpy.get_type('com.bc.ceres.core.ProgressMonitor')
+        _snap_initialized = True
+        log("✅ SNAP inicializace dokončena.")
+
+
+# Function: find_safe_products
+# Description: Return sorted paths of all .SAFE folders in the input folder.
+def find_safe_products(folder):
+    return [os.path.join(folder, item) for item in sorted(os.listdir(folder)) if item.endswith(".SAFE")]
+
+
+# Function: move_into
+# Description: Move everything from a temporary folder into the target folder, replacing existing entries, and
+#   remove the temporary folder. Folders are moved first, so a product header (e.g. .dim) only appears under its
+#   final name once its data is in place.
+def move_into(temp_folder, folder):
+    entries = sorted(os.listdir(temp_folder), key=lambda name: not os.path.isdir(os.path.join(temp_folder, name)))
+    for name in entries:
+        target = os.path.join(folder, name)
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        os.replace(os.path.join(temp_folder, name), target)
+    os.rmdir(temp_folder)
+
+
+# Function: extract_safe
+# Description: Extract a downloaded product .zip next to itself and return the .SAFE folder path.
+#   Extraction also verifies the CRC of every member and waits for free space for the uncompressed data. The
+#   archive is extracted into a temporary folder and moved into place when complete.
+# Params: zip_path (str), job (optional Job for cooperative cancel while waiting for space), log (optional callable).
+def extract_safe(zip_path, job=None, log=None):
+    from storage_manager import get_storage_manager
+    storage = get_storage_manager()
+    folder = os.path.dirname(zip_path)
+    with zipfile.ZipFile(zip_path) as zf:
+        safe_names = {name.split("/")[0] for name in zf.namelist() if name.split("/")[0].endswith(".SAFE")}
+        if not safe_names:
+            raise ValueError(f"Archiv neobsahuje .SAFE složku: {zip_path}")
+        reservation = storage.wait_for_space(folder, sum(info.file_size for info in zf.infolist()), job, log)
+        temp_folder = tempfile.mkdtemp(prefix=TEMP_PREFIX, dir=folder)
+        try:
+            for info in zf.infolist():
+                zf.extract(info, temp_folder)
+                storage.consume(reservation, info.file_size)
+            move_into(temp_folder, folder)
+        finally:
+            storage.release(reservation)
+            shutil.rmtree(temp_folder, ignore_errors=True)
+    return os.path.join(folder, sorted(safe_names)[0])
+
+
+# Function: _stage_reporter
+# Description: Return stage(fraction, name) that reports progress and honours pause/cancel of the job.
+def _stage_reporter(job):
+    def stage(fraction, name):
+        if job is not None:
+            job.checkpoint()
+            job.set_progress(fraction, name)
+    return stage
+
+
+# Function: read_resampled
+# Description: Read an L1C .SAFE product and resample all bands to a common resolution.
+# Params: safe_path (str), log (callable), resolution (int, target resolution in metres, one of RESOLUTIONS).
+def read_resampled(safe_path, log, resolution=DEFAULT_RESOLUTION):
+    input_mtd = os.path.join(safe_path, "MTD_MSIL1C.xml")
+    log(f"📂 Načítám produkt: {input_mtd}")
+    product = ProductIO.readProduct(input_mtd)
+
+    Integer = jpy.get_type('java.lang.Integer')
+    resample_params = HashMap()
+    resample_params.put('targetResolution', Integer(int(resolution)))
+    resample_params.put('upsampling', 'Nearest')
+    resample_params.put('downsampling', 'First')
+    resample_params.put('resampleOnPyramidLevels', False)
+
+    log(f"📏 Resample na {resolution} m...", logging.DEBUG)
+    return GPF.createProduct('Resample', resample_params, product)
+
+
+# Function: run_c2rcc
+# Description: Create the C2RCC MSI operator product with the given output flags.
+def run_c2rcc(product, outputs, log):
+    log("🌊 Spouštím C2RCC...")
+    params = HashMap()
+    for name, value in C2RCC_PARAMETERS.items():
+        params.put(name, value)
+    for name, enabled in outputs.items():
+        params.put(name, bool(enabled))
+    return GPF.createProduct('c2rcc.msi', params, product)
+
+
+# Function: estimate_size
+# Description: Upper estimate (bytes) of a product written as BEAM-DIMAP: all bands at full scene size.
+def estimate_size(product):
+    ProductData = jpy.get_type('org.esa.snap.core.datamodel.ProductData')
+    pixels = product.getSceneRasterWidth() * product.getSceneRasterHeight()
+    return sum(pixels * ProductData.getElemSize(band.getDataType()) for band in product.getBands())
+
+
+# Function: write_product
+# Description: Write a product (BEAM-DIMAP by default) and return the output path (without extension).
+#   Waits (paused) until the estimated output fits on the volume above the storage watermark. The product is
+#   written into a temporary folder and moved to output_path when complete, so an interrupted write never leaves
+#   a truncated product under the final name.
+# Params: product, output_path (str, without extension), log (callable), job (optional Job for cancel while waiting),
+#   format_name (SNAP writer name, e.g. "BEAM-DIMAP", "GeoTIFF", "NetCDF4-CF").
+def write_product(product, output_path, log, job=None, format_name=DEFAULT_FORMAT):
+    from storage_manager import get_storage_manager
+    storage = get_storage_manager()
+    folder = os.path.dirname(os.path.abspath(output_path))
+    reservation = storage.wait_for_space(folder, estimate_size(product), job, log)
+    temp_folder = tempfile.mkdtemp(prefix=TEMP_PREFIX, dir=folder)
+    try:
+        log("💾 Exportuji zvolené produkty...")
+        temp_path = os.path.join(temp_folder, os.path.basename(output_path))
+        GPF.writeProduct(product, File(temp_path), format_name, False, ProgressMonitor.NULL)
+        move_into(temp_folder, folder)
+    finally:
+        storage.release(reservation)
+        shutil.rmtree(temp_folder, ignore_errors=True)
+    log(f"✅ Hotovo: {output_path} ({format_name})")
+    return output_path
+
+
+# Function: catalog_output
+# Description: Read a written BEAM-DIMAP output back and record it in the catalogue of its folder
+#   (output_catalog.py) with the WGS84 footprint, band list and share of valid water pixels within the AOI
+#   (usable_fraction). Cataloguing never fails the processing; errors are only logged.
+# Params: output_path (str, without extension), safe_paths (input .SAFE paths), shapefile (AOI path or None),
+#   outputs (dict of output flags), resolution (int, metres), log (callable).
+def catalog_output(output_path, safe_paths, shapefile, outputs, resolution, log):
+    import output_catalog
+    try:
+        product = ProductIO.readProduct(output_path + ".dim")
+        try:
+            boundary = ProductUtils.createGeoBoundary(product, 50)
+            lons = [pos.lon for pos in boundary]
+            lats = [pos.lat for pos in boundary]
+            bbox = (min(lons), min(lats), max(lons), max(lats))
+            bands = list(product.getBandNames())
+            valid = None
+            if product.getBand("c2rcc_flags") is not None:
+                valid = usable_fraction(product, read_aoi_wkt(shapefile, log))
+        finally:
+            product.dispose()
+        aoi = shapefile if shapefile and os.path.exists(shapefile) else None
+        output_catalog.record_output(output_catalog.build_record(
+            output_path, safe_paths, aoi, resolution, dict(C2RCC_PARAMETERS, **outputs), bands, bbox, valid
+        ))
+        log(f"🗂️ Zapsáno do katalogu výstupů: {os.path.basename(output_path)}", logging.DEBUG)
+    except Exception as e:
+        log(f"⚠️ Výstup se nepodařilo zapsat do katalogu: {e}", logging.WARNING)
+
+
+# Function: output_name
+# Description: Output product name of a single .SAFE product processed without an AOI; non-default resolutions are
+#   part of the name.
+def output_name(safe_path, resolution=DEFAULT_RESOLUTION):
+    suffix = "_C2RCC" if int(resolution) == DEFAULT_RESOLUTION else f"_C2RCC_{int(resolution)}m"
+    return os.path.basename(os.path.normpath(safe_path)) + suffix
+
+
+# Function: geo_boundary_wkt
+# Description: Return the WGS84 footprint of a product as a WKT polygon. Raises if the product has no geocoding.
+def geo_boundary_wkt(product, step=50):
+    points = [(pos.lon, pos.lat) for pos in ProductUtils.createGeoBoundary(product, step)]
+    if points[0] != points[-1]:
+        points.append(points[0])
+    return "POLYGON ((" + ", ".join(f"{lon:.8f} {lat:.8f}" for lon, lat in points) + "))"
+
+
+# Function: intersects_aoi
+# Description: Return True if the footprint of a product intersects the AOI geometry (JTS Geometry from
+#   read_geometry).
+def intersects_aoi(product, aoi_geometry):
+    return read_geometry(geo_boundary_wkt(product)).intersects(aoi_geometry)
+
+
+# Function: read_geometry
+# Description: Parse WKT into a JTS Geometry.
+def read_geometry(wkt):
+    WKTReader = jpy.get_type('org.locationtech.jts.io.WKTReader')
+    return WKTReader().read(wkt)
+
+
+# Function: subset_to_aoi
+# Description: Subset a product to the pixel region covering the AOI polygons (WGS84 WKT). The product must
+#   intersect the AOI (intersects_aoi).
+def subset_to_aoi(product, aoi_wkt):
+    subset_params = HashMap()
+    subset_params.put('geoRegion', aoi_wkt)
+    subset_params.put('copyMetadata', True)
+    return GPF.createProduct('Subset', subset_params, product)
+
+
+# Function: read_aoi_wkt
+# Description: Return the AOI polygons of a shapefile as WGS84 WKT, or None without an AOI.
+# Params: shapefile (AOI shapefile path or None), log (callable).
+def read_aoi_wkt(shapefile, log):
+    if not (shapefile and os.path.exists(shapefile)):
+        return None
+    import cdse_client
+    return cdse_client.get_aoi_wkt_from_shapefile(shapefile, log)
+
+
+# Function: add_aoi_mask
+# Description: Add the AOI polygons (WGS84 WKT) to a product as vector data in its scene CRS; SNAP creates a mask of
+#   the same name covering the pixels inside the polygons.
+# Returns: name of the mask.
+def add_aoi_mask(product, aoi_wkt, name=AOI_MASK_NAME):
+    CRS = jpy.get_type('org.geotools.referencing.CRS')
+    JTS = jpy.get_type('org.geotools.geometry.jts.JTS')
+    DefaultGeographicCRS = jpy.get_type('org.geotools.referencing.crs.DefaultGeographicCRS')
+    PlainFeatureFactory = jpy.get_type('org.esa.snap.core.datamodel.PlainFeatureFactory')
+    VectorDataNode = jpy.get_type('org.esa.snap.core.datamodel.VectorDataNode')
+    scene_crs = product.getSceneCRS()
+    geometry = JTS.transform(read_geometry(aoi_wkt), CRS.findMathTransform(DefaultGeographicCRS.WGS84, scene_crs, True))
+    feature_type = PlainFeatureFactory.createDefaultFeatureType(scene_crs)
+    node = VectorDataNode(name, feature_type)
+    node.getFeatureCollection().add(PlainFeatureFactory.createPlainFeature(feature_type, name, geometry, None))
+    product.getVectorDataGroup().add(node)
+    return name
+
+
+# Function: _band_mean
+# Description: Add a virtual band with the given expression and return its mean.
+def _band_mean(product, name, expression):
+    band = product.addBand(name, expression)
+    return float(band.getStx(True, ProgressMonitor.NULL).getMean())
+
+
+# Function: usable_fraction
+# Description: Share of usable pixels (TRIAGE_VALID_EXPRESSION) of a C2RCC product. With an AOI only pixels inside
+#   the AOI polygons count (usable AOI pixels / AOI pixels), not the whole rectangle the input was subset to.
+# Params: product (C2RCC Product with c2rcc_flags), aoi_wkt (WGS84 WKT or None for the whole product).
+# Returns: float in [0, 1]; 0.0 if the AOI covers no pixel.
+def usable_fraction(product, aoi_wkt=None):
+    usable = f"({TRIAGE_VALID_EXPRESSION})"
+    if aoi_wkt is None:
+        return _band_mean(product, "usable", f"{usable} ? 1 : 0")
+    mask = add_aoi_mask(product, aoi_wkt)
+    aoi_share = _band_mean(product, "aoi_pixels", f"{mask} ? 1 : 0")
+    if aoi_share == 0:
+        return 0.0
+    return _band_mean(product, "usable", f"({mask} && {usable}) ? 1 : 0") / aoi_share
+
+
+# Function: mosaic_products
+# Description: Mosaic AOI subsets of one datatake onto a single grid in the CRS of the first product, keeping the
+#   band names, spectral properties, metadata and sensing time C2RCC expects from a resampled L1C product.
+# Params: products (list of subset Products), aoi_bounds (xmin, ymin, xmax, ymax in WGS84), log (callable).
+def mosaic_products(products, aoi_bounds, log):
+    log(f"🧩 Mozaika {len(products)} dlaždic ze stejného přeletu...")
+    first = products[0]
+    band_names = [name for name in first.getBandNames()
+                  if all(p.getBand(name) is not None for p in products[1:])]
+
+    Variable = jpy.get_type('org.esa.snap.core.gpf.common.MosaicOp$Variable')
+    variables = jpy.array('org.esa.snap.core.gpf.common.MosaicOp$Variable', len(band_names))
+    for i, name in enumerate(band_names):
+        variables[i] = Variable(name, name)
+
+    pixel_size = first.getSceneGeoCoding().getImageToMapTransform().getScaleX()
+    xmin, ymin, xmax, ymax = aoi_bounds
+    params = HashMap()
+    params.put('variables', variables)
+    params.put('crs', first.getSceneGeoCoding().getMapCRS().toWKT())
+    params.put('orthorectify', False)
+    params.put('westBound', float(xmin))
+    params.put('eastBound', float(xmax))
+    params.put('southBound', float(ymin))
+    params.put('northBound', float(ymax))
+    params.put('pixelSizeX', float(pixel_size))
+    params.put('pixelSizeY', float(pixel_size))
+    params.put('resampling', 'Nearest')
+
+    sources = jpy.array('org.esa.snap.core.datamodel.Product', len(products))
+    for i, product in enumerate(products):
+        sources[i] = product
+    mosaic = GPF.createProduct('Mosaic', params, sources)
+
+    for name in band_names:
+        target_band = mosaic.getBand(name)
+        if target_band is not None:
+            ProductUtils.copySpectralBandProperties(first.getBand(name), target_band)
+    ProductUtils.copyMetadata(first, mosaic)
+    mosaic.setStartTime(first.getStartTime())
+    mosaic.setEndTime(products[-1].getEndTime())
+    return mosaic
+
+
+# Function: aoi_input
+# Description: Build the AOI-bounded C2RCC input of a processing unit: each product is resampled and subset to
+#   the AOI polygons (shapefile geometry), products whose footprint does not intersect the AOI are skipped and the
+#   rest is mosaicked. Without an AOI the single product is only resampled.
+# Params: safe_paths (list of .SAFE paths of one datatake), shapefile (AOI shapefile path or None),
+#   resolution (int, metres), log (callable), stage (optional stage(fraction, name) reporter).
+# Returns: Product, or None if no product covers the AOI.
+def aoi_input(safe_paths, shapefile, resolution, log, stage=None):
+    aoi_wkt = read_aoi_wkt(shapefile, log)
+    if aoi_wkt is None:
+        return read_resampled(safe_paths[0], log, resolution)
+
+    import shapefile_reader
+    aoi_geometry = read_geometry(aoi_wkt)
+    subsets = []
+    for i, safe_path in enumerate(safe_paths):
+        if stage is not None:
+            stage(0.3 * i / len(safe_paths), "resample")
+        product = read_resampled(safe_path, log, resolution)
+        if not intersects_aoi(product, aoi_geometry):
+            log(f"⏭️ Produkt nepokrývá AOI: {os.path.basename(safe_path)}", logging.DEBUG)
+            product.dispose()
+            continue
+        log("✂️ Ořez podle AOI...", logging.DEBUG)
+        subsets.append(subset_to_aoi(product, aoi_wkt))
+
+    if not subsets:
+        return None
+    if len(subsets) == 1:
+        return subsets[0]
+    if stage is not None:
+        stage(0.3, "mosaic")
+    return mosaic_products(subsets, shapefile_reader.wkt_bounds(aoi_wkt), log)
+
+
+# Function: valid_fraction
+# Description: Triage tier: run C2RCC at TRIAGE_RESOLUTION over the AOI and return the fraction of AOI pixels
+#   matching TRIAGE_VALID_EXPRESSION (usable_fraction). Only the flag band is computed, so this costs a small part
+#   of a full run.
+# Params: safe_paths (list of .SAFE paths of one processing unit), shapefile (AOI shapefile path or None),
+#   log (callable).
+# Returns: float in [0, 1]; 0.0 if no product covers the AOI.
+def valid_fraction(safe_paths, shapefile, log):
+    log(f"🔎 Náhledový běh C2RCC ({TRIAGE_RESOLUTION} m)...")
+    product = aoi_input(safe_paths, shapefile, TRIAGE_RESOLUTION, log)
+    if product is None:
+        return 0.0
+    product_c2rcc = run_c2rcc(product, {name: False for name in DEFAULT_OUTPUTS}, log)
+    return usable_fraction(product_c2rcc, read_aoi_wkt(shapefile, log))
+
+
+# Function: process_group
+# Description: Run the Resample -> Subset -> (Mosaic) -> C2RCC -> write chain for one processing unit and record
+#   the output in the output catalogue. With an AOI, the products of one datatake (or a single product) are clipped
+#   to the AOI and mosaicked (see aoi_input), C2RCC runs once and the output is named per AOI and date
+#   (tile_grouping.group_output_name, with the tile when mosaic is off); without an AOI every product is
+#   processed on its own and named after it (output_name). With
+#   min_valid_fraction set, each unit first goes through the 60 m triage tier (valid_fraction) and is skipped if
+#   too little of the AOI is usable. SNAP must be initialized (init_snap) first.
+# Params: safe_paths (list of .SAFE paths from tile_grouping.group_products), output_folder (str),
+#   shapefile (optional AOI shapefile path), outputs (optional dict of C2RCC output flags, defaults to
+#   DEFAULT_OUTPUTS), job (optional Job for progress and cooperative pause/cancel between stages),
+#   log (optional callable for status messages), resolution (int, target resolution in metres),
+#   min_valid_fraction (optional float, triage threshold; None disables triage), mosaic (bool, mosaic the tiles
+#   of a datatake; otherwise every product is clipped and processed on its own).
+# Returns: list of written output paths (without .dim extension); empty if no product covers the AOI or the
+#   unit failed triage.
+def process_group(safe_paths, output_folder, shapefile=None, outputs=None, job=None, log=None,
+                  resolution=DEFAULT_RESOLUTION, min_valid_fraction=None, mosaic=True):
+    log = log or _log
+    has_aoi = bool(shapefile and os.path.exists(shapefile))
+    if len(safe_paths) > 1 and not (has_aoi and mosaic):
+        return [output for safe_path in safe_paths
+                for output in process_group([safe_path], output_folder, shapefile, outputs, job, log,
+                                            resolution, min_valid_fraction, mosaic)]
+
+    import tile_grouping
+    outputs = dict(DEFAULT_OUTPUTS, **(outputs or {}))
+    stage = _stage_reporter(job)
+    if has_aoi:
+        suffix = "" if int(resolution) == DEFAULT_RESOLUTION else f"_{int(resolution)}m"
+        name = tile_grouping.group_output_name(safe_paths, shapefile, per_tile=not mosaic) + suffix
+    else:
+        name = output_name(safe_paths[0], resolution)
+
+    if min_valid_fraction is not None and int(resolution) != TRIAGE_RESOLUTION:
+        stage(0.05, "triage")
+        fraction = valid_fraction(safe_paths, shapefile, log)
+        if fraction < min_valid_fraction:
+            log(f"⏭️ Vyřazeno náhledem: {name} (použitelných pixelů {fraction:.0%} < {min_valid_fraction:.0%})",
+                logging.WARNING)
+            return []
+        log(f"✅ Náhled v pořádku: {name} (použitelných pixelů {fraction:.0%})")
+
+    stage(0.2, "resample")
+    product = aoi_input(safe_paths, shapefile, resolution, log, stage)
+    if product is None:
+        log(f"⚠️ Žádný produkt nepokrývá AOI: {name}", logging.WARNING)
+        return []
+
+    stage(0.4, "c2rcc")
+    product_c2rcc = run_c2rcc(product, outputs, log)
+
+    stage(0.5, "write")
+    output_path = os.path.join(output_folder, name)
+    write_product(product_c2rcc, output_path, log, job)
+    catalog_output(output_path, safe_paths, shapefile, outputs, resolution, log)
+    return [output_path]
+
+
+# Function: process_unit
+# Description: Run process_group for one processing unit with a settings dict (see processing_settings in the
+#   GUI/CLI: output_folder, shapefile, mosaic, outputs, resolution, triage, min_valid_fraction).
+# Returns: list of written output paths.
+def process_unit(safe_paths, settings, job=None, log=None):
+    min_valid_fraction = None
+    if settings.get("triage"):
+        min_valid_fraction = settings.get("min_valid_fraction", DEFAULT_MIN_VALID_FRACTION)
+    return process_group(
+        safe_paths,
+        settings["output_folder"],
+        settings.get("shapefile"),
+        settings.get("outputs"),
+        job,
+        log,
+        settings.get("resolution", DEFAULT_RESOLUTION),
+        min_valid_fraction,
+        settings.get("mosaic", True)
+    )
+
+
+# Function: plan_jobs
+# Description: Split .SAFE products into processing units: datatake groups when mosaicking is enabled and an AOI is
+#   given, otherwise one unit per product.
+# Params: safe_paths (list of str), settings (processing settings dict with shapefile and mosaic).
+# Returns: list of lists of .SAFE paths.
+def plan_jobs(safe_paths, settings):
+    import tile_grouping
+    if settings.get("mosaic") and settings.get("shapefile") and os.path.exists(settings["shapefile"]):
+        return tile_grouping.group_products(safe_paths)
+    return [[path] for path in safe_paths]
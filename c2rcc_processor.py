@@ -1,26 +1,23 @@
 # c2rcc_processor.py
+import logging
 import os
-import threading
-import sys
 
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
-    QPushButton, QTextEdit, QCheckBox, QFileDialog, QGroupBox, QMessageBox
+    QPushButton, QPlainTextEdit, QCheckBox, QFileDialog, QGroupBox, QMessageBox, QComboBox, QSpinBox
 )
 from PySide6.QtCore import Qt, Signal, QObject
 from translations import translations
-
-# SNAP cesta
-sys.path.append('C:\\Users\\rybar\\.snap\\snap-python')
+from job_engine import get_scheduler, JobGroup, JobCancelled, SNAP, DONE, FAILED, CANCELLED
+import c2rcc_core
+from log_sink import LogSink, LEVELS
 
 # ----------------------------------------------------------------------------------------------------------------------
 # Class: C2RCCSignals
 # Description: Defines custom signals for logging and messaging between the processing thread and GUI.
 # Signals:
-#   log_signal (str): Emits log messages.
 #   message_signal (str, str, str): Emits popup dialogs: (title, message, type).
 class C2RCCSignals(QObject):
-    log_signal = Signal(str)
     message_signal = Signal(str, str, str)
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -34,12 +31,10 @@ class C2RCCProcessorGUI(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.signals = C2RCCSignals()
-        self.snap_initialized = False
         self.current_language = "cs"
         self.setup_gui()
 
         # Signály
-        self.signals.log_signal.connect(self.log)
         self.signals.message_signal.connect(self.show_message)
 
     # Function: setup_gui
@@ -91,15 +86,60 @@ class C2RCCProcessorGUI(QWidget):
             output_layout.addWidget(cb)
         layout.addWidget(self.output_group)
 
+        # Mozaikování dlaždic ze stejného přeletu (jen s shapefile)
+        self.check_mosaic = QCheckBox()
+        self.check_mosaic.setChecked(True)
+        layout.addWidget(self.check_mosaic)
+
+        # Rozlišení a náhledová kontrola (60 m) před plným zpracováním
+        resolution_layout = QHBoxLayout()
+        resolution_layout.setAlignment(Qt.AlignLeft)
+        self.resolution_label = QLabel()
+        self.resolution_combo = QComboBox()
+        for resolution in c2rcc_core.RESOLUTIONS:
+            self.resolution_combo.addItem(f"{resolution} m", resolution)
+        self.resolution_combo.setCurrentIndex(c2rcc_core.RESOLUTIONS.index(c2rcc_core.DEFAULT_RESOLUTION))
+        resolution_layout.addWidget(self.resolution_label)
+        resolution_layout.addWidget(self.resolution_combo)
+        layout.addLayout(resolution_layout)
+
+        triage_layout = QHBoxLayout()
+        triage_layout.setAlignment(Qt.AlignLeft)
+        self.check_triage = QCheckBox()
+        self.min_valid_spin = QSpinBox()
+        self.min_valid_spin.setRange(0, 100)
+        self.min_valid_spin.setSuffix(" %")
+        self.min_valid_spin.setValue(round(c2rcc_core.DEFAULT_MIN_VALID_FRACTION * 100))
+        self.min_valid_spin.setEnabled(False)
+        self.check_triage.toggled.connect(self.min_valid_spin.setEnabled)
+        triage_layout.addWidget(self.check_triage)
+        triage_layout.addWidget(self.min_valid_spin)
+        layout.addLayout(triage_layout)
+
         # Tlačítko spuštění
         self.process_button = QPushButton()
         self.process_button.clicked.connect(self.run_thread)
         layout.addWidget(self.process_button)
 
         # Log
-        self.log_text = QTextEdit()
+        log_level_layout = QHBoxLayout()
+        log_level_layout.setAlignment(Qt.AlignLeft)
+        self.log_level_label = QLabel()
+        self.log_level_combo = QComboBox()
+        for label, level in LEVELS:
+            self.log_level_combo.addItem(label, level)
+        self.log_level_combo.setCurrentIndex(1)
+        log_level_layout.addWidget(self.log_level_label)
+        log_level_layout.addWidget(self.log_level_combo)
+        layout.addLayout(log_level_layout)
+
+        self.log_text = QPlainTextEdit()
         self.log_text.setReadOnly(True)
         layout.addWidget(self.log_text)
+        self.log_sink = LogSink(self.log_text, "c2rcc")
+        self.log_level_combo.currentIndexChanged.connect(
+            lambda: self.log_sink.set_level(self.log_level_combo.currentData())
+        )
 
         self.setLayout(layout)
         self.update_translations(self.current_language)
@@ -120,7 +160,12 @@ class C2RCCProcessorGUI(QWidget):
         self.check_kd.setText(translations[lang]["kd"])
         self.check_unc.setText(translations[lang]["unc"])
         self.check_total.setText(translations[lang]["total"])
+        self.check_mosaic.setText(translations[lang]["mosaic"])
+        self.resolution_label.setText(translations[lang]["resolution"])
+        self.check_triage.setText(translations[lang]["triage"])
+        self.min_valid_spin.setToolTip(translations[lang]["min_valid_fraction"])
         self.process_button.setText(translations[lang]["process"])
+        self.log_level_label.setText(translations[lang]["log_level"])
 
     # Function: select_folder
     # Description: Open a folder dialog and set path into the provided QLineEdit.
@@ -139,10 +184,10 @@ class C2RCCProcessorGUI(QWidget):
             entry.setText(file_path)
 
     # Function: log
-    # Description: Append a message to the GUI log text area.
-    # Params: message (str).
-    def log(self, message):
-        self.log_text.append(message)
+    # Description: Queue a message for the log area (thread-safe, flushed in batches).
+    # Params: message (str), level (logging level, default INFO).
+    def log(self, message, level=logging.INFO):
+        self.log_sink.write(message, level)
 
     # Function: show_message
     # Description: Display a popup dialog based on msg_type ('info' or 'error').
@@ -153,99 +198,92 @@ class C2RCCProcessorGUI(QWidget):
         else:
             QMessageBox.information(self, title, message)
 
+    # Function: run_thread
+    # Description: Validate the input folder and queue one SNAP job per .SAFE product in the shared scheduler.
+    #   Products already queued or being processed are not queued twice.
     def run_thread(self):
-        threading.Thread(target=self.run_processing).start()
-
-    # Function: init_snap
-    # Description: Initialize the SNAP Java gateway and required modules once before processing.
-    def init_snap(self):
-        if not self.snap_initialized:
-            self.signals.log_signal.emit("🛠️ Inicializuji SNAP prostředí...")
-            global ProductIO, GPF, HashMap, jpy, ProductUtils, File, ProgressMonitor
-            from esa_snappy import ProductIO, GPF, HashMap, jpy, ProductUtils
-            File = jpy.get_type('java.io.File')
-            ProgressMonitor = jpy.get_type('com.bc.ceres.core.ProgressMonitor')
-            self.snap_initialized = True
-            self.signals.log_signal.emit("✅ SNAP inicializace dokončena.")
-
-    # Function: run_processing
-    # Description: Execute full C2RCC processing for each .SAFE product in the input folder:
-    #   1. Initialize SNAP (if not already).
-    #   2. Validate inputs and paths.
-    #   3. Resample to 10m, subset by shapefile (optional).
-    #   4. Configure C2RCC parameters and run processing.
-    #   5. Export outputs and notify user.
-    def run_processing(self):
-        try:
-            self.init_snap()
-            vstup = self.input_entry.text()
-            vystup = self.output_entry.text()
-            shp = self.shapefile_entry.text()
-
-            if not os.path.exists(vstup):
-                self.signals.message_signal.emit(
-                    translations[self.current_language]["error"],
-                    translations[self.current_language]["invalid_input"],
-                    "error"
-                )
-                return
-
-            for item in os.listdir(vstup):
-                if item.endswith(".SAFE"):
-                    safe_path = os.path.join(vstup, item)
-                    input_mtd = os.path.join(safe_path, "MTD_MSIL1C.xml")
-                    self.signals.log_signal.emit(f"📂 Načítám produkt: {input_mtd}")
-                    product = ProductIO.readProduct(input_mtd)
-
-                    Integer = jpy.get_type('java.lang.Integer')
-                    resample_params = HashMap()
-                    resample_params.put('targetResolution', Integer(10))
-                    resample_params.put('upsampling', 'Nearest')
-                    resample_params.put('downsampling', 'First')
-                    resample_params.put('resampleOnPyramidLevels', False)
-
-                    self.signals.log_signal.emit("📏 Resample...")
-                    product_resampled = GPF.createProduct('Resample', resample_params, product)
-
-                    if shp and os.path.exists(shp):
-                        self.signals.log_signal.emit("✂️ Ořez podle shapefile...")
-                        subset_params = HashMap()
-                        subset_params.put('shapefile', shp)
-                        product_subset = GPF.createProduct('Subset', subset_params, product_resampled)
-                    else:
-                        product_subset = product_resampled
-                        self.signals.log_signal.emit("✂️ Přeskakuji ořez...")
-
-                    self.signals.log_signal.emit("🌊 Spouštím C2RCC...")
-                    params = HashMap()
-                    params.put('salinity', '35.0')
-                    params.put('temperature', '15.0')
-                    params.put('ozone', '330')
-                    params.put('press', '1013')
-                    params.put('outputAsRrs', self.check_rrs.isChecked())
-                    params.put('outputAcReflectance', self.check_ac.isChecked())
-                    params.put('outputIop', self.check_iop.isChecked())
-                    params.put('outputIopBio', self.check_iopbio.isChecked())
-                    params.put('outputKd', self.check_kd.isChecked())
-                    params.put('outputUncertainties', self.check_unc.isChecked())
-                    params.put('outputTotalConc', self.check_total.isChecked())
-
-                    product_c2rcc = GPF.createProduct('c2rcc.msi', params, product_subset)
-
-                    output_path = os.path.join(vystup, os.path.basename(safe_path) + "_C2RCC")
-                    self.signals.log_signal.emit("💾 Exportuji zvolené produkty...")
-                    GPF.writeProduct(product_c2rcc, File(output_path), "BEAM-DIMAP", False, ProgressMonitor.NULL)
-                    self.signals.log_signal.emit(f"✅ Hotovo: {output_path}.dim")
+        vstup = self.input_entry.text()
+        settings = self.processing_settings()
 
+        if not os.path.exists(vstup):
             self.signals.message_signal.emit(
-                translations[self.current_language]["complete"],
-                translations[self.current_language]["processing_complete"],
-                "info"
+                translations[self.current_language]["error"],
+                translations[self.current_language]["invalid_input"],
+                "error"
             )
-
-        except Exception as e:
+            return
+
+        group = JobGroup("c2rcc", on_finished=self.processing_finished)
+        scheduler = get_scheduler()
+        for safe_paths in c2rcc_core.plan_jobs(c2rcc_core.find_safe_products(vstup), settings):
+            item = " + ".join(os.path.basename(path) for path in safe_paths)
+            job = scheduler.submit(f"C2RCC: {item}", self.run_processing, safe_paths, settings,
+                                   resource=SNAP, key=f"c2rcc:{safe_paths[0]}", group=group)
+            if job is None:
+                self.log(f"⏭️ Již ve frontě: {item}")
+        group.close()
+
+    # Function: processing_settings
+    # Description: Collect processing settings from the widgets into a plain dict for the Qt-free core.
+    def processing_settings(self):
+        return {
+            "output_folder": self.output_entry.text(),
+            "shapefile": self.shapefile_entry.text(),
+            "mosaic": self.check_mosaic.isChecked(),
+            "resolution": self.resolution_combo.currentData(),
+            "triage": self.check_triage.isChecked(),
+            "min_valid_fraction": self.min_valid_spin.value() / 100,
+            "outputs": {
+                "outputAsRrs": self.check_rrs.isChecked(),
+                "outputAcReflectance": self.check_ac.isChecked(),
+                "outputIop": self.check_iop.isChecked(),
+                "outputIopBio": self.check_iopbio.isChecked(),
+                "outputKd": self.check_kd.isChecked(),
+                "outputUncertainties": self.check_unc.isChecked(),
+                "outputTotalConc": self.check_total.isChecked(),
+            },
+        }
+
+    # Function: processing_finished
+    # Description: Notify the user once all queued products of a run are finished; failures are reported with
+    #   the error dialog.
+    # Params: group (JobGroup).
+    def processing_finished(self, group):
+        units = [job for job in group.jobs if job.resource == SNAP]  # pipeline groups also hold extraction jobs
+        if not units:
+            return
+        counts = {state: sum(1 for job in units if job.state == state) for state in (DONE, FAILED, CANCELLED)}
+        self.log(f"🏁 Zpracováno {counts[DONE]} z {len(units)} produktů.")
+        if counts[FAILED]:
             self.signals.message_signal.emit(
                 translations[self.current_language]["error"],
-                str(e),
+                translations[self.current_language]["processing_failed"].format(
+                    failed=counts[FAILED], cancelled=counts[CANCELLED], done=counts[DONE], total=len(units)
+                ),
                 "error"
-            )
\ No newline at end of file
+            )
+            return
+        self.signals.message_signal.emit(
+            translations[self.current_language]["complete"],
+            translations[self.current_language]["processing_complete"],
+            "info"
+        )
+
+    # Function: run_processing
+    # Description: Job body executing full C2RCC processing of one processing unit (a product or a datatake group):
+    #   1. Initialize SNAP (if not already).
+    #   2. Optionally triage the unit with a 60 m C2RCC preview and skip it if too little of the AOI is usable.
+    #   3. Resample to the chosen resolution, subset by shapefile (optional), mosaic tiles of the same datatake.
+    #   4. Configure C2RCC parameters and run processing.
+    #   5. Export outputs.
+    # Params: job (Job), safe_paths (list of .SAFE paths), settings (dict from processing_settings).
+    def run_processing(self, job, safe_paths, settings):
+        log = self.log
+        try:
+            c2rcc_core.init_snap(log)
+            return c2rcc_core.process_unit(safe_paths, settings, job, log)
+        except JobCancelled:
+            raise
+        except Exception as e:
+            log(f"❌ Chyba při zpracování {', '.join(safe_paths)}: {e}", logging.ERROR)
+            raise
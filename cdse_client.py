@@ -0,0 +1,465 @@
+# cdse_client.py
+# Qt-free access to the Copernicus Data Space Ecosystem (CDSE): authentication, product search and download.
+# Used by SentinelDownloaderGUI and by the headless CLI (sen2tools_cli.py).
+import logging
+import os
+import re
+import threading
+import time
+import zipfile
+from datetime import datetime
+
+import shapefile_reader
+from job_engine import JobCancelled
+from log_util import default_log
+
+# requests, geopandas and shapely are imported on first use to keep application startup fast.
+
+_log = default_log("sen2tools.cdse")
+
+DEFAULT_TOKEN_URL = "https://identity.dataspace.copernicus.eu/auth/realms/CDSE/protocol/openid-connect/token"
+DEFAULT_CATALOGUE_URL = "https://catalogue.dataspace.copernicus.eu/odata/v1"
+# Endpoints in use; overridden by the CDSE_TOKEN_URL / CDSE_CATALOGUE_URL environment variables or
+# configure_endpoints() (e.g. the local stand-in server benchmarks/mock_cdse.py).
+TOKEN_URL = os.environ.get("CDSE_TOKEN_URL", DEFAULT_TOKEN_URL)
+CATALOGUE_URL = os.environ.get("CDSE_CATALOGUE_URL", DEFAULT_CATALOGUE_URL)
+
+PRODUCT_TYPE_CODES = {
+    "Level-2A": "S2MSI2A",
+    "Level-1C": "S2MSI1C"
+}
+
+# Products per catalogue page; further pages are followed via @odata.nextLink.
+SEARCH_PAGE_SIZE = 100
+
+DOWNLOAD_CHUNK_SIZE = 8192
+# Download progress is logged (DEBUG) every time this fraction of the file is received.
+DOWNLOAD_REPORT_STEP = 0.1
+# An interrupted download is resumed with a Range request at most this many times.
+DOWNLOAD_RESUME_ATTEMPTS = 3
+# Suffix of a download in progress; renamed to the final .zip once verified.
+PARTIAL_SUFFIX = ".part"
+
+# Throttled/unavailable responses are retried; without a Retry-After header the wait doubles from RETRY_BACKOFF s.
+RETRY_STATUS = (429, 503)
+MAX_RETRIES = 5
+RETRY_BACKOFF = 2.0
+REDIRECT_STATUS = (301, 302, 303, 307, 308)
+
+# An access token is renewed this many seconds before it expires (at most half of its lifetime).
+TOKEN_EXPIRY_MARGIN = 60
+# Lifetimes assumed when the token endpoint does not send expires_in / refresh_expires_in.
+DEFAULT_TOKEN_LIFETIME = 600
+DEFAULT_REFRESH_LIFETIME = 3600
+
+
+# Function: configure_endpoints
+# Description: Point the client at other token/catalogue endpoints (None keeps the current value).
+def configure_endpoints(token_url=None, catalogue_url=None):
+    global TOKEN_URL, CATALOGUE_URL
+    if token_url:
+        TOKEN_URL = token_url
+    if catalogue_url:
+        CATALOGUE_URL = catalogue_url.rstrip("/")
+
+
+# Function: _wait
+# Description: Sleep for the given time, honouring pause/cancel of the job.
+def _wait(seconds, job=None):
+    deadline = time.monotonic() + seconds
+    while True:
+        if job is not None:
+            job.checkpoint()
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        time.sleep(min(remaining, 0.5))
+
+
+# Function: request_with_retry
+# Description: Send an HTTP request and retry it while the server throttles it (429/503), waiting as long as the
+#   Retry-After header says or with exponential backoff. A session authorised with an AccessToken renews the token
+#   and repeats the request once when the server answers 401.
+# Params: session (requests.Session or the requests module), method (str), url (str), log (optional callable),
+#   job (optional Job for cancel while waiting), **kwargs passed to session.request.
+# Returns: the last response.
+def request_with_retry(session, method, url, log=None, job=None, **kwargs):
+    log = log or _log
+    auth = getattr(session, "auth", None)
+    renewed = False
+    attempt = 0
+    while True:
+        response = session.request(method, url, **kwargs)
+        if response.status_code == 401 and isinstance(auth, AccessToken) and not renewed:
+            response.close()
+            log("🔑 Přístupový token byl odmítnut, obnovuji ho...", logging.DEBUG)
+            auth.renew(stale=response.request.headers.get("Authorization"))
+            renewed = True
+            continue
+        if response.status_code not in RETRY_STATUS or attempt == MAX_RETRIES:
+            return response
+        retry_after = response.headers.get("Retry-After", "")
+        delay = float(retry_after) if retry_after.isdigit() else RETRY_BACKOFF * 2 ** attempt
+        response.close()
+        log(f"⏳ Server omezuje požadavky (HTTP {response.status_code}), opakuji za {delay:.0f} s...",
+            logging.DEBUG)
+        _wait(delay, job)
+        attempt += 1
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Class: AccessToken
+# Description: CDSE access token that renews itself. Access tokens expire after a few minutes (expires_in), so the
+#   token is renewed shortly before expiry or after a 401 with the refresh token, falling back to the password
+#   grant once the refresh token has expired too. Used as the auth of a requests session (create_session), so long
+#   batches keep working; safe to share between download threads.
+class AccessToken:
+    # Function: __init__
+    # Description: Log in (password grant).
+    # Params: username, password (str).
+    def __init__(self, username, password):
+        self._username = username
+        self._password = password
+        self._lock = threading.Lock()
+        self._access_token = None
+        self._refresh_token = None
+        self._expires_at = 0.0
+        self._refresh_expires_at = 0.0
+        self._renew()
+
+    # Function: get
+    # Description: Current access token, renewed first if it is about to expire.
+    def get(self):
+        with self._lock:
+            if time.monotonic() >= self._expires_at:
+                self._renew()
+            return self._access_token
+
+    # Function: renew
+    # Description: Renew the token after the server rejected it.
+    # Params: stale (optional Authorization header of the rejected request; if the token has been renewed since
+    #   by another thread, nothing is done).
+    def renew(self, stale=None):
+        with self._lock:
+            if stale is None or stale == self.header():
+                self._renew()
+
+    # Function: header
+    # Description: Value of the Authorization header for the current token.
+    def header(self):
+        return f"Bearer {self._access_token}"
+
+    def _renew(self):
+        import requests
+        if self._refresh_token and time.monotonic() < self._refresh_expires_at:
+            try:
+                self._request_token({"grant_type": "refresh_token", "refresh_token": self._refresh_token})
+                return
+            except requests.HTTPError as e:
+                _log(f"Obnovení tokenu selhalo ({e}), přihlašuji se znovu", logging.DEBUG)
+        self._request_token({"grant_type": "password", "username": self._username, "password": self._password})
+
+    def _request_token(self, grant):
+        import requests
+        r = request_with_retry(requests, "POST", TOKEN_URL, data={"client_id": "cdse-public", **grant})
+        r.raise_for_status()
+        payload = r.json()
+        now = time.monotonic()
+        lifetime = float(payload.get("expires_in") or DEFAULT_TOKEN_LIFETIME)
+        self._access_token = payload["access_token"]
+        self._expires_at = now + lifetime - min(TOKEN_EXPIRY_MARGIN, lifetime / 2)
+        self._refresh_token = payload.get("refresh_token")
+        refresh_lifetime = float(payload.get("refresh_expires_in") or DEFAULT_REFRESH_LIFETIME)
+        self._refresh_expires_at = now + refresh_lifetime - min(TOKEN_EXPIRY_MARGIN, refresh_lifetime / 2)
+
+    # Function: __call__
+    # Description: requests auth hook: set the Authorization header of an outgoing request.
+    def __call__(self, request):
+        request.headers["Authorization"] = f"Bearer {self.get()}"
+        return request
+
+
+# Function: get_keycloak_token
+# Description: Log in to Keycloak using provided credentials.
+# Returns: AccessToken (renews itself; pass it wherever a token is expected).
+def get_keycloak_token(username, password):
+    return AccessToken(username, password)
+
+
+# Function: get_wkt_from_shapefile
+# Description: Convert shapefile geometry to a WGS84 bounding box WKT.
+#   Shapefiles already in WGS84 are read by the pure-Python shapefile_reader; others are reprojected via geopandas.
+# Params: filepath (str), log (optional callable for status messages).
+def get_wkt_from_shapefile(filepath, log=None):
+    log = log or _log
+    prj = shapefile_reader.read_prj(filepath)
+    bounds = shapefile_reader.read_bounds(filepath)
+    if shapefile_reader.is_wgs84(prj) or (prj is None and shapefile_reader.looks_geographic(bounds)):
+        log(f"Načten shapefile: {filepath}, CRS: EPSG:4326")
+        log(f"Vypočtený bounding box: {list(bounds)}")
+        return shapefile_reader.bbox_wkt(bounds)
+
+    import geopandas as gpd
+    from shapely.geometry import box
+    gdf = gpd.read_file(filepath)
+    log(f"Načten shapefile: {filepath}, CRS: {gdf.crs}")
+    if gdf.crs != "EPSG:4326":
+        gdf = gdf.to_crs("EPSG:4326")
+        log("Transformace na EPSG:4326 proběhla.")
+    bounds = gdf.total_bounds
+    log(f"Vypočtený bounding box: {bounds}")
+    return box(*bounds).wkt
+
+
+# Function: get_aoi_wkt_from_shapefile
+# Description: Return the AOI polygons of a shapefile as WGS84 WKT (used to clip and test products in processing;
+#   the catalogue search uses the bounding box from get_wkt_from_shapefile).
+# Params: filepath (str), log (optional callable for status messages).
+def get_aoi_wkt_from_shapefile(filepath, log=None):
+    log = log or _log
+    prj = shapefile_reader.read_prj(filepath)
+    bounds = shapefile_reader.read_bounds(filepath)
+    if shapefile_reader.is_wgs84(prj) or (prj is None and shapefile_reader.looks_geographic(bounds)):
+        return shapefile_reader.polygons_wkt(shapefile_reader.read_polygons(filepath))
+
+    import geopandas as gpd
+    gdf = gpd.read_file(filepath)
+    if gdf.crs != "EPSG:4326":
+        gdf = gdf.to_crs("EPSG:4326")
+        log("Transformace AOI na EPSG:4326 proběhla.", logging.DEBUG)
+    return gdf.geometry.union_all().wkt
+
+
+# Function: validate_search_params
+# Description: Check mandatory search inputs (dates, cloud cover, AOI, save folder).
+# Params: date_from, date_to (str YYYY-MM-DD), cloud_cover (str or number), shapefile (str), folder (str).
+# Returns: list of error messages (empty when valid).
+def validate_search_params(date_from, date_to, cloud_cover, shapefile, folder):
+    errors = []
+
+    # Validate dates
+    for label, date_str in [("date_from", date_from), ("date_to", date_to)]:
+        try:
+            if not re.fullmatch(r"\d{4}-\d{2}-\d{2}", date_str):
+                raise ValueError("Invalid date format")
+            date_obj = datetime.strptime(date_str, "%Y-%m-%d")
+            if date_obj > datetime.now():
+                errors.append(f"Datum v poli {label} nesmí být v budoucnosti.")
+        except ValueError:
+            errors.append(f"Neplatný formát datumu v poli {label}. Očekává se YYYY-MM-DD.")
+
+    # Validate date range
+    if not errors:
+        if datetime.strptime(date_from, "%Y-%m-%d") > datetime.strptime(date_to, "%Y-%m-%d"):
+            errors.append("Datum 'Od' nemůže být pozdější než datum 'Do'.")
+
+    # Validate cloud cover
+    try:
+        value = float(str(cloud_cover).replace(',', '.'))
+        if value < 0 or value > 100:
+            errors.append("Hodnota oblačnosti musí být mezi 0 a 100.")
+    except ValueError:
+        errors.append("Hodnota oblačnosti není platné číslo.")
+
+    # Validate shapefile
+    if not shapefile or not os.path.exists(shapefile):
+        errors.append("Neplatný shapefile.")
+
+    # Validate save folder
+    if not folder or not os.path.isdir(folder):
+        errors.append("Neplatná výstupní složka.")
+
+    return errors
+
+
+# Function: build_search_url
+# Description: Build the OData query URL for Sentinel-2 products.
+# Params: wkt (AOI WKT in EPSG:4326), date_from, date_to (str YYYY-MM-DD), cloud_cover, product_type ("Level-1C"|...).
+def build_search_url(wkt, date_from, date_to, cloud_cover, product_type):
+    product_type_code = PRODUCT_TYPE_CODES.get(product_type, "S2MSI2A")
+    cloud_cover = str(cloud_cover).replace(',', '.')
+    return f"{CATALOGUE_URL}/Products?" \
+        f"$filter=Collection/Name eq 'SENTINEL-2'" \
+        f" and Attributes/OData.CSC.StringAttribute/any(att:att/Name eq 'productType' and att/OData.CSC.StringAttribute/Value eq '{product_type_code}')" \
+        f" and Attributes/OData.CSC.DoubleAttribute/any(att:att/Name eq 'cloudCover' and att/OData.CSC.DoubleAttribute/Value lt {cloud_cover})" \
+        f" and OData.CSC.Intersects(area=geography'SRID=4326;{wkt}')" \
+        f" and ContentDate/Start gt {date_from}T00:00:00.000Z" \
+        f" and ContentDate/Start lt {date_to}T00:00:00.000Z" \
+        f"&$count=True&$top={SEARCH_PAGE_SIZE}&$expand=Assets"
+
+
+# Function: create_session
+# Description: Create a requests session authorised with the given access token.
+# Params: token (AccessToken, renewed as needed, or a plain access token str).
+def create_session(token):
+    import requests
+    session = requests.Session()
+    if isinstance(token, AccessToken):
+        session.auth = token
+    else:
+        session.headers.update({"Authorization": f"Bearer {token}"})
+    return session
+
+
+# Function: search_products
+# Description: Query the CDSE catalogue for Sentinel-2 products matching the parameters, following all result pages.
+# Params: token (AccessToken or str), shapefile (str), date_from, date_to (str YYYY-MM-DD), cloud_cover,
+#   product_type (str), log (optional callable for status messages).
+# Returns: list of OData product dicts.
+def search_products(token, shapefile, date_from, date_to, cloud_cover, product_type, log=None):
+    log = log or _log
+    wkt = get_wkt_from_shapefile(shapefile, log)
+    url = build_search_url(wkt, date_from, date_to, cloud_cover, product_type)
+
+    log("Odesílám dotaz na API...")
+    session = create_session(token)
+    products = []
+    while url:
+        response = request_with_retry(session, "GET", url, log)
+        log(f"HTTP status: {response.status_code}", logging.DEBUG)
+        response.raise_for_status()
+        page = response.json()
+        products.extend(page.get("value", []))
+        url = page.get("@odata.nextLink")
+    log(f"Počet nalezených produktů: {len(products)}")
+    return products
+
+
+# Function: quicklook_url
+# Description: Return the quicklook download URL of a product (from the expanded Assets), or None.
+def quicklook_url(product):
+    for asset in product.get("Assets", []):
+        if asset.get("Type") == "QUICKLOOK":
+            return asset.get("DownloadLink") or f"{CATALOGUE_URL}/Assets({asset['Id']})/$value"
+    return None
+
+
+# Function: fetch_quicklook
+# Description: Return the local quicklook path of a product, downloading it into the cache on a miss.
+# Params: token (AccessToken or str), product (OData product dict), cache (QuicklookCache), job (optional Job for
+#   cancel), session (optional requests session from create_session, shared by a batch of quicklooks).
+# Returns: path of the cached quicklook, or None if the product has no quicklook.
+def fetch_quicklook(token, product, cache, job=None, session=None):
+    path = cache.get(product["Id"])
+    if path:
+        return path
+    url = quicklook_url(product)
+    if not url:
+        return None
+    if job is not None:
+        job.checkpoint()
+    response = request_with_retry(session or create_session(token), "GET", url, job=job, timeout=60)
+    response.raise_for_status()
+    return cache.put(product["Id"], response.content)
+
+
+# Function: product_zip_path
+# Description: Return the local .zip path of a product in the given folder.
+def product_zip_path(product, folder):
+    return os.path.join(folder, f"{product['Name'].split('.')[0]}.zip")
+
+
+# Function: verify_download
+# Description: Check that a downloaded file is complete (size matches Content-Length) and is a readable zip.
+# Params: file_path (str), expected_size (int or None).
+def verify_download(file_path, expected_size):
+    size = os.path.getsize(file_path)
+    if expected_size is not None and size != expected_size:
+        raise IOError(f"Neúplné stažení: {size} z {expected_size} B")
+    if not zipfile.is_zipfile(file_path):
+        raise IOError("Stažený soubor není platný ZIP archiv")
+
+
+# Function: _total_size
+# Description: Return the full size of the file served by a (partial) response, or None if unknown.
+def _total_size(response):
+    content_range = response.headers.get("Content-Range", "")
+    if response.status_code == 206 and "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total.isdigit() else None
+    length = response.headers.get("Content-Length")
+    return int(length) if length else None
+
+
+# Function: download_product
+# Description: Download one product via streaming into the folder and verify it.
+#   Waits (paused) while the product would not fit above the storage watermark. Redirects are followed manually
+#   (keeping the Authorization header), throttled requests are retried and an interrupted transfer is resumed with
+#   a Range request. Data is written to "<name>.zip.part" and renamed once verified, so an interrupted run (or
+#   application exit) never leaves a truncated .zip under the final name; a failed or cancelled download removes
+#   the partial file.
+# Params: token (AccessToken or str), product (OData product dict), folder (str), job (optional Job for progress and
+#   cooperative pause/cancel), log (optional callable for status messages).
+# Returns: path of the downloaded .zip.
+def download_product(token, product, folder, job=None, log=None):
+    import requests
+    from storage_manager import get_storage_manager
+    log = log or _log
+    storage = get_storage_manager()
+    prod_name = product["Name"].split(".")[0]
+    file_path = product_zip_path(product, folder)
+    part_path = file_path + PARTIAL_SUFFIX
+    download_url = f"{CATALOGUE_URL}/Products({product['Id']})/$value"
+    reservation = storage.wait_for_space(folder, product.get("ContentLength"), job, log)
+    session = create_session(token)
+    log(f"Stahuji: {prod_name}")
+    try:
+        file_resp = request_with_retry(session, "GET", download_url, log, job, allow_redirects=False, stream=True)
+        while file_resp.status_code in REDIRECT_STATUS:
+            file_resp.close()
+            download_url = file_resp.headers["Location"]
+            file_resp = request_with_retry(session, "GET", download_url, log, job, allow_redirects=False,
+                                           stream=True)
+
+        expected_size = None
+        written = 0
+        next_report = DOWNLOAD_REPORT_STEP
+        attempt = 0
+        with open(part_path, "wb") as f:
+            while True:
+                file_resp.raise_for_status()
+                if written and file_resp.status_code != 206:
+                    # The server ignored the Range header: start over.
+                    f.seek(0)
+                    f.truncate()
+                    written = 0
+                expected_size = _total_size(file_resp) or expected_size
+                try:
+                    for chunk in file_resp.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        if job is not None:
+                            job.checkpoint()
+                        if chunk:
+                            f.write(chunk)
+                            written += len(chunk)
+                            storage.consume(reservation, len(chunk))
+                            if expected_size:
+                                if job is not None:
+                                    job.set_progress(written / expected_size)
+                                if written / expected_size >= next_report:
+                                    log(f"{prod_name}: {written / expected_size:.0%} "
+                                        f"({written / 1024 ** 2:.0f} MB)", logging.DEBUG)
+                                    next_report += DOWNLOAD_REPORT_STEP
+                    if expected_size is None or written >= expected_size:
+                        break
+                    error = f"{written} z {expected_size} B"
+                except (requests.ConnectionError, requests.exceptions.ChunkedEncodingError) as e:
+                    error = e
+                attempt += 1
+                if attempt > DOWNLOAD_RESUME_ATTEMPTS:
+                    break
+                log(f"⚠️ Přerušené stahování {prod_name} ({error}), navazuji od {written} B...", logging.WARNING)
+                f.flush()
+                file_resp = request_with_retry(session, "GET", download_url, log, job, stream=True,
+                                               headers={"Range": f"bytes={written}-"})
+        verify_download(part_path, expected_size)
+        os.replace(part_path, file_path)
+        log(f"Uloženo do: {file_path}")
+        return file_path
+    except Exception as e:
+        if isinstance(e, JobCancelled):
+            log(f"Stahování zrušeno: {prod_name}", logging.WARNING)
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    finally:
+        storage.release(reservation)
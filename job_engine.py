@@ -0,0 +1,373 @@
+# job_engine.py
+import itertools
+import queue
+import threading
+import time
+
+# Resource classes, each served by its own bounded worker pool.
+NETWORK = "network"
+INTERACTIVE = "interactive"  # short requests the user waits for (search, quicklooks), never queued behind downloads
+SNAP = "snap"
+DISK = "disk"
+
+# Default pool sizes: a few parallel transfers, two interactive requests, one SNAP job at a time (single JVM heap),
+# two disk jobs.
+DEFAULT_POOL_SIZES = {NETWORK: 4, INTERACTIVE: 2, SNAP: 1, DISK: 2}
+
+# Job priorities (lower value runs first).
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+# Job states.
+QUEUED = "queued"
+RUNNING = "running"
+PAUSED = "paused"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+# How many finished jobs are kept for the queue view.
+FINISHED_HISTORY = 200
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Class: JobCancelled
+# Description: Raised from Job.checkpoint() when the job has been cancelled.
+class JobCancelled(Exception):
+    pass
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Class: Job
+# Description: A unit of background work. The job function receives the Job as its first argument and is expected
+#   to call job.checkpoint() regularly - that is where cooperative pause and cancel take effect.
+class Job:
+    _ids = itertools.count(1)
+
+    # Function: __init__
+    # Params: name (str, shown in the queue view), func (callable(job, *args)), args (tuple),
+    #   resource (NETWORK|INTERACTIVE|SNAP|DISK), priority (int), key (optional str used to reject duplicate submissions).
+    def __init__(self, name, func, args=(), resource=NETWORK, priority=PRIORITY_NORMAL, key=None):
+        self.id = next(Job._ids)
+        self.name = name
+        self.func = func
+        self.args = args
+        self.resource = resource
+        self.priority = priority
+        self.key = key
+        self.state = QUEUED
+        self.progress = 0.0
+        self.message = ""
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel_event = threading.Event()
+        self._resume_event = threading.Event()
+        self._resume_event.set()
+        self._done_event = threading.Event()
+        self._callbacks = []
+        self._callbacks_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._parked = False  # paused before it started: taken off the queue until resume()
+        self._requeue = None  # set by JobScheduler.submit: callable putting the job back into its queue
+
+    # Function: checkpoint
+    # Description: Cooperative pause/cancel point. Raises JobCancelled if cancelled, blocks while paused.
+    def checkpoint(self):
+        if self._cancel_event.is_set():
+            raise JobCancelled(self.name)
+        if not self._resume_event.is_set():
+            self.state = PAUSED
+            while not self._resume_event.wait(0.5):
+                if self._cancel_event.is_set():
+                    raise JobCancelled(self.name)
+            self.state = RUNNING
+
+    # Function: cancel
+    # Description: Request cancellation. Jobs that have not started are cancelled right away, running jobs stop at
+    #   the next checkpoint.
+    def cancel(self):
+        with self._state_lock:
+            self._cancel_event.set()
+            self._resume_event.set()
+            if self.started_at is not None or self.state in FINISHED_STATES:
+                return
+            self._parked = False
+        self._finish(CANCELLED)
+
+    # Function: pause
+    # Description: Request a pause at the next checkpoint. A job that has not started yet stays out of its worker
+    #   pool (it is skipped when taken off the queue) until resume().
+    def pause(self):
+        with self._state_lock:
+            if self.state in FINISHED_STATES or self._cancel_event.is_set():
+                return
+            self._resume_event.clear()
+            if self.started_at is None:
+                self.state = PAUSED
+
+    # Function: resume
+    # Description: Resume a paused job; a job parked before it started is put back into its queue.
+    def resume(self):
+        with self._state_lock:
+            self._resume_event.set()
+            if self.started_at is not None or self.state in FINISHED_STATES:
+                return
+            self.state = QUEUED
+            requeue, self._parked = self._parked, False
+        if requeue:
+            self._requeue()
+
+    # Function: is_cancelled
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    # Function: is_pause_requested
+    def is_pause_requested(self):
+        return not self._resume_event.is_set()
+
+    # Function: set_progress
+    # Description: Update progress shown in the queue view.
+    # Params: fraction (float 0-1), message (optional str).
+    def set_progress(self, fraction, message=None):
+        self.progress = max(0.0, min(1.0, fraction))
+        if message is not None:
+            self.message = message
+
+    # Function: add_done_callback
+    # Description: Call callback(job) once the job is finished (done, failed or cancelled).
+    #   Called immediately if the job is already finished. Runs in the worker thread.
+    def add_done_callback(self, callback):
+        with self._callbacks_lock:
+            if not self._done_event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    # Function: wait
+    # Description: Block until the job is finished. Returns False on timeout.
+    def wait(self, timeout=None):
+        return self._done_event.wait(timeout)
+
+    # Function: _start
+    # Description: Called by a worker that took the job off the queue. Marks it running and returns True, or
+    #   returns False if the job must not run now (already cancelled, or paused and therefore parked).
+    def _start(self):
+        with self._state_lock:
+            if self.state in FINISHED_STATES:
+                return False
+            if not self._resume_event.is_set():
+                self._parked = True
+                return False
+            self.state = RUNNING
+            self.started_at = time.time()
+            return True
+
+    # Function: _finish
+    # Description: Record the final state and run done callbacks.
+    def _finish(self, state):
+        self.state = state
+        self.finished_at = time.time()
+        if state == DONE:
+            self.progress = 1.0
+        with self._callbacks_lock:
+            self._done_event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception:
+                pass
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Class: JobGroup
+# Description: Tracks a batch of jobs and calls on_finished(group) once all of them are finished and the group
+#   was closed (no more jobs will be added).
+class JobGroup:
+    # Function: __init__
+    # Params: name (str), on_finished (optional callable(group)).
+    def __init__(self, name, on_finished=None):
+        self.name = name
+        self.on_finished = on_finished
+        self.jobs = []
+        self._pending = 0
+        self._closed = False
+        self._fired = False
+        self._lock = threading.Lock()
+
+    # Function: add
+    # Description: Register a submitted job in the group (ignored for None, i.e. rejected submissions).
+    def add(self, job):
+        if job is None:
+            return
+        with self._lock:
+            self.jobs.append(job)
+            self._pending += 1
+        job.add_done_callback(self._job_finished)
+
+    # Function: close
+    # Description: Mark that no more jobs will be added.
+    def close(self):
+        with self._lock:
+            self._closed = True
+        self._maybe_fire()
+
+    # Function: cancel
+    # Description: Cancel all jobs of the group.
+    def cancel(self):
+        for job in list(self.jobs):
+            job.cancel()
+
+    # Function: is_finished
+    # Description: Return True once the group was closed and all its jobs are finished.
+    def is_finished(self):
+        return self._fired
+
+    # Function: count
+    # Description: Return the number of jobs in the given state.
+    def count(self, state):
+        return sum(1 for job in self.jobs if job.state == state)
+
+    def _job_finished(self, job):
+        with self._lock:
+            self._pending -= 1
+        self._maybe_fire()
+
+    def _maybe_fire(self):
+        with self._lock:
+            if not self._closed or self._pending or self._fired:
+                return
+            self._fired = True
+        if self.on_finished:
+            self.on_finished(self)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Class: JobScheduler
+# Description: Shared job scheduler with a bounded worker pool per resource class and a priority queue per pool.
+class JobScheduler:
+    # Function: __init__
+    # Params: pool_sizes (optional dict resource -> number of workers, merged over DEFAULT_POOL_SIZES).
+    def __init__(self, pool_sizes=None):
+        self.pool_sizes = dict(DEFAULT_POOL_SIZES)
+        if pool_sizes:
+            self.pool_sizes.update(pool_sizes)
+        self._queues = {}
+        self._jobs = []
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._threads = []
+        for resource, size in self.pool_sizes.items():
+            self._queues[resource] = queue.PriorityQueue()
+            for i in range(size):
+                thread = threading.Thread(target=self._worker, args=(resource,), name=f"{resource}-worker-{i}",
+                                          daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    # Function: submit
+    # Description: Queue a job. Returns the Job, or None if a job with the same key is still queued or running.
+    # Params: name (str), func (callable(job, *args)), *args, resource, priority, key, group (optional JobGroup).
+    def submit(self, name, func, *args, resource=NETWORK, priority=PRIORITY_NORMAL, key=None, group=None):
+        if resource not in self._queues:
+            raise ValueError(f"Neznámý typ prostředku: {resource}")
+        with self._lock:
+            if key is not None and any(j.key == key and j.state not in FINISHED_STATES for j in self._jobs):
+                return None
+            job = Job(name, func, args, resource, priority, key)
+            self._jobs.append(job)
+            self._trim_history()
+        job._requeue = lambda: self._queues[resource].put((priority, next(self._seq), job))
+        if group is not None:
+            group.add(job)
+        job._requeue()
+        return job
+
+    # Function: jobs
+    # Description: Return a snapshot list of known jobs (active and recently finished).
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs)
+
+    # Function: is_active
+    # Description: Return True if any job whose key starts with the given prefix is queued or running.
+    def is_active(self, key_prefix):
+        with self._lock:
+            return any(j.key and j.key.startswith(key_prefix) and j.state not in FINISHED_STATES
+                       for j in self._jobs)
+
+    # Function: cancel_all
+    # Description: Cancel every unfinished job.
+    def cancel_all(self):
+        for job in self.jobs():
+            if job.state not in FINISHED_STATES:
+                job.cancel()
+
+    # Function: clear_finished
+    # Description: Drop finished jobs from the history shown in the queue view.
+    def clear_finished(self):
+        with self._lock:
+            self._jobs = [j for j in self._jobs if j.state not in FINISHED_STATES]
+
+    # Function: shutdown
+    # Description: Cancel every unfinished job and stop the worker threads (on application exit, or for
+    #   schedulers created outside get_scheduler, e.g. by benchmarks). Running jobs stop at their next checkpoint.
+    # Params: timeout (optional float, seconds to wait for all workers to exit in total).
+    # Returns: True if all workers exited within the timeout.
+    def shutdown(self, timeout=None):
+        self.cancel_all()
+        for resource, size in self.pool_sizes.items():
+            for _ in range(size):
+                self._queues[resource].put((float("inf"), next(self._seq), None))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        return not any(thread.is_alive() for thread in self._threads)
+
+    def _trim_history(self):
+        finished = [j for j in self._jobs if j.state in FINISHED_STATES]
+        if len(finished) > FINISHED_HISTORY:
+            drop = set(id(j) for j in finished[:len(finished) - FINISHED_HISTORY])
+            self._jobs = [j for j in self._jobs if id(j) not in drop]
+
+    # Function: _worker
+    # Description: Worker loop of one pool: take the highest-priority job and run it. Cancelled jobs are dropped
+    #   and paused ones parked, so they never hold a worker.
+    def _worker(self, resource):
+        q = self._queues[resource]
+        while True:
+            _, _, job = q.get()
+            if job is None:  # shutdown
+                return
+            if not job._start():
+                continue
+            try:
+                job.checkpoint()
+                job.result = job.func(job, *job.args)
+                job._finish(DONE)
+            except JobCancelled:
+                job._finish(CANCELLED)
+            except Exception as e:
+                job.error = e
+                job.message = str(e)
+                job._finish(FAILED)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+# Function: get_scheduler
+# Description: Return the process-wide scheduler shared by all tabs, creating it on first use.
+# Params: pool_sizes (optional dict, only used when the scheduler is created).
+def get_scheduler(pool_sizes=None):
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = JobScheduler(pool_sizes)
+        return _scheduler
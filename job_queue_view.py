@@ -0,0 +1,110 @@
+# job_queue_view.py
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget,
+                               QTableWidgetItem, QHeaderView, QAbstractItemView)
+from PySide6.QtCore import QTimer, QItemSelectionModel
+from job_engine import get_scheduler
+from translations import translations
+
+# Refresh interval of the queue view (ms).
+REFRESH_INTERVAL_MS = 500
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Class: JobQueueGUI
+# Description: Queue view of the shared job scheduler with pause/resume/cancel of the selected jobs.
+class JobQueueGUI(QWidget):
+    # Function: __init__
+    # Description: Build the table and start the periodic refresh timer.
+    # Params: parent (optional QWidget parent).
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.scheduler = get_scheduler()
+        self.current_language = "cs"
+        self.row_jobs = []
+        self.setup_gui()
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(REFRESH_INTERVAL_MS)
+
+    # Function: setup_gui
+    # Description: Construct the job table and the control buttons.
+    def setup_gui(self):
+        layout = QVBoxLayout(self)
+
+        self.table = QTableWidget(0, 6)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        self.pause_button = QPushButton()
+        self.pause_button.clicked.connect(lambda: self.apply_to_selected("pause"))
+        self.resume_button = QPushButton()
+        self.resume_button.clicked.connect(lambda: self.apply_to_selected("resume"))
+        self.cancel_button = QPushButton()
+        self.cancel_button.clicked.connect(lambda: self.apply_to_selected("cancel"))
+        self.cancel_all_button = QPushButton()
+        self.cancel_all_button.clicked.connect(self.scheduler.cancel_all)
+        self.clear_button = QPushButton()
+        self.clear_button.clicked.connect(self.scheduler.clear_finished)
+        for button in [self.pause_button, self.resume_button, self.cancel_button,
+                       self.cancel_all_button, self.clear_button]:
+            button_layout.addWidget(button)
+        layout.addLayout(button_layout)
+
+        self.setLayout(layout)
+        self.update_translations(self.current_language)
+
+    def update_translations(self, lang):
+        self.current_language = lang
+        self.table.setHorizontalHeaderLabels([
+            "ID",
+            translations[lang]["job_name"],
+            translations[lang]["job_resource"],
+            translations[lang]["job_priority"],
+            translations[lang]["job_state"],
+            translations[lang]["job_progress"],
+        ])
+        self.pause_button.setText(translations[lang]["job_pause"])
+        self.resume_button.setText(translations[lang]["job_resume"])
+        self.cancel_button.setText(translations[lang]["job_cancel"])
+        self.cancel_all_button.setText(translations[lang]["job_cancel_all"])
+        self.clear_button.setText(translations[lang]["job_clear"])
+
+    # Function: refresh
+    # Description: Rebuild table rows from the scheduler snapshot, keeping the selection by job ID.
+    def refresh(self):
+        selected_ids = {self.row_jobs[i.row()].id for i in self.table.selectionModel().selectedRows()
+                        if i.row() < len(self.row_jobs)}
+        self.row_jobs = self.scheduler.jobs()
+        self.table.setRowCount(len(self.row_jobs))
+        for row, job in enumerate(self.row_jobs):
+            state = translations[self.current_language].get(f"job_state_{job.state}", job.state)
+            progress = f"{job.progress * 100:.0f} %"
+            if job.message:
+                progress += f" – {job.message}"
+            for col, value in enumerate([str(job.id), job.name, job.resource, str(job.priority), state, progress]):
+                item = self.table.item(row, col)
+                if item is None:
+                    self.table.setItem(row, col, QTableWidgetItem(value))
+                elif item.text() != value:
+                    item.setText(value)
+        self.table.clearSelection()
+        for row, job in enumerate(self.row_jobs):
+            if job.id in selected_ids:
+                self.table.selectionModel().select(
+                    self.table.model().index(row, 0),
+                    QItemSelectionModel.Select | QItemSelectionModel.Rows
+                )
+
+    # Function: apply_to_selected
+    # Description: Call pause/resume/cancel on every selected job.
+    # Params: action (method name on Job).
+    def apply_to_selected(self, action):
+        for index in self.table.selectionModel().selectedRows():
+            if index.row() < len(self.row_jobs):
+                getattr(self.row_jobs[index.row()], action)()
+        self.refresh()
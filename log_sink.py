@@ -0,0 +1,112 @@
+# log_sink.py
+import collections
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+
+from PySide6.QtCore import QObject, QTimer
+
+# Default location of the rotating structured log file.
+DEFAULT_LOG_FILE = os.path.join(os.path.expanduser("~"), ".sen2tools", "logs", "sen2tools.log")
+LOG_FILE_MAX_BYTES = 10 * 1024 ** 2
+LOG_FILE_BACKUPS = 5
+
+# Widget defaults: how often buffered messages are flushed and how many lines the widget keeps.
+FLUSH_INTERVAL_MS = 250
+MAX_WIDGET_LINES = 5000
+# Messages waiting for the next flush; older ones are dropped from the widget (not from the file) when exceeded.
+MAX_PENDING = 20000
+
+# Levels offered in the level filter (label, logging level).
+LEVELS = [("DEBUG", logging.DEBUG), ("INFO", logging.INFO), ("WARNING", logging.WARNING), ("ERROR", logging.ERROR)]
+
+file_logger = logging.getLogger("sen2tools.file")
+file_logger.propagate = False
+_file_lock = threading.Lock()
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Class: JsonLineFormatter
+# Description: Formats log records as one JSON object per line (ts, level, source, message).
+class JsonLineFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps({
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "source": getattr(record, "source", record.name),
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }, ensure_ascii=False)
+
+
+# Function: configure_file_logging
+# Description: Attach a rotating JSON-lines file handler to the file logger (once per process).
+# Params: path (str, log file path).
+def configure_file_logging(path=DEFAULT_LOG_FILE):
+    with _file_lock:
+        if file_logger.handlers:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUPS, encoding="utf-8"
+            )
+        except OSError:
+            handler = logging.NullHandler()
+        handler.setFormatter(JsonLineFormatter())
+        file_logger.addHandler(handler)
+        file_logger.setLevel(logging.DEBUG)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Class: LogSink
+# Description: Thread-safe, throttled log sink of one GUI tab. write() may be called from any thread; messages are
+#   buffered and flushed to the QPlainTextEdit in one batch per timer tick on the GUI thread. The widget keeps at
+#   most max_lines lines (ring buffer) and shows only messages at or above the selected level; every message is
+#   also written to the rotating structured log file.
+class LogSink(QObject):
+    # Function: __init__
+    # Params: widget (QPlainTextEdit), source (str, name of the tab in the log file), level (minimum level shown),
+    #   max_lines (int), flush_interval_ms (int).
+    def __init__(self, widget, source, level=logging.INFO, max_lines=MAX_WIDGET_LINES,
+                 flush_interval_ms=FLUSH_INTERVAL_MS):
+        super().__init__(widget)
+        self.widget = widget
+        self.source = source
+        self.level = level
+        self.widget.setMaximumBlockCount(max_lines)
+        self._pending = collections.deque(maxlen=MAX_PENDING)
+        self._lock = threading.Lock()
+        configure_file_logging()
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.flush)
+        self.timer.start(flush_interval_ms)
+
+    # Function: write
+    # Description: Queue a message for the widget and write it to the log file. Safe to call from any thread.
+    # Params: message (str), level (logging level, default INFO).
+    def write(self, message, level=logging.INFO):
+        file_logger.log(level, message, extra={"source": self.source})
+        if level < self.level:
+            return
+        with self._lock:
+            self._pending.append(message)
+
+    # Function: set_level
+    # Description: Change the minimum level shown in the widget (the file always gets everything).
+    def set_level(self, level):
+        self.level = level
+
+    # Function: flush
+    # Description: Append all buffered messages to the widget in one call (GUI thread, driven by the timer).
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            messages = list(self._pending)
+            self._pending.clear()
+        self.widget.appendPlainText("\n".join(messages))
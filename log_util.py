@@ -0,0 +1,14 @@
+# log_util.py
+# Qt-free logging helpers shared by the core modules (log_sink.py is the Qt side and imports PySide6).
+import logging
+
+
+# Function: default_log
+# Description: Log callable used when the caller passes none; log(message, level) forwards to the named logger.
+# Params: name (str, logger name, e.g. "sen2tools.cdse").
+def default_log(name):
+    logger = logging.getLogger(name)
+
+    def log(message, level=logging.INFO):
+        logger.log(level, message)
+    return log
@@ -3,10 +3,16 @@ import sys
 from PySide6.QtWidgets import (QApplication, QMainWindow, QTabWidget, QWidget, 
                               QVBoxLayout, QHBoxLayout, QPushButton)
 from PySide6.QtCore import Qt
+from job_engine import get_scheduler
 from sentinel2_downloader import SentinelDownloaderGUI
 from c2rcc_processor import C2RCCProcessorGUI
+from pipeline import DownloadProcessPipeline
+from job_queue_view import JobQueueGUI
 from translations import translations
 
+# Seconds to wait on exit for running jobs to stop at their next checkpoint.
+SHUTDOWN_TIMEOUT = 10
+
 # ----------------------------------------------------------------------------------------------------------------------
 # Class: MainApp
 # Description: Main window with two tabs for downloading and processing Sentinel-2 data.
@@ -56,7 +62,31 @@ class MainApp(QMainWindow):
         self.process_tab = QWidget()
         self.process_gui = C2RCCProcessorGUI(self.process_tab)
         self.tab_widget.addTab(self.process_tab, translations[self.current_language]["process_tab"])
+
+        # Jobs tab (queue of the shared scheduler)
+        self.jobs_tab = QWidget()
+        self.jobs_gui = JobQueueGUI(self.jobs_tab)
+        jobs_layout = QVBoxLayout(self.jobs_tab)
+        jobs_layout.setContentsMargins(0, 0, 0, 0)
+        jobs_layout.addWidget(self.jobs_gui)
+        self.tab_widget.addTab(self.jobs_tab, translations[self.current_language]["jobs_tab"])
+
+        # Streaming download -> process pipeline between the two tabs
+        self.download_gui.pipeline = DownloadProcessPipeline(
+            self.process_gui.processing_settings,
+            log=self.process_gui.log,
+            on_finished=self.process_gui.processing_finished
+        )
         
+    # Function: closeEvent
+    # Description: Cancel all jobs and wait for the workers to stop before the window closes. Result popups of the
+    #   cancelled batches are suppressed.
+    def closeEvent(self, event):
+        self.download_gui.comm.blockSignals(True)
+        self.process_gui.signals.blockSignals(True)
+        get_scheduler().shutdown(timeout=SHUTDOWN_TIMEOUT)
+        super().closeEvent(event)
+
     def set_language(self, lang):
         self.current_language = lang
         self.update_translations()
@@ -70,10 +100,12 @@ class MainApp(QMainWindow):
         # Update tab names
         self.tab_widget.setTabText(0, translations[self.current_language]["download_tab"])
         self.tab_widget.setTabText(1, translations[self.current_language]["process_tab"])
+        self.tab_widget.setTabText(2, translations[self.current_language]["jobs_tab"])
         
         # Update child widgets
         self.download_gui.update_translations(self.current_language)
         self.process_gui.update_translations(self.current_language)
+        self.jobs_gui.update_translations(self.current_language)
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
@@ -0,0 +1,283 @@
+# output_catalog.py
+import contextlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+
+import tile_grouping
+from c2rcc_core import DEFAULT_RESOLUTION, TEMP_PREFIX
+from log_util import default_log
+
+_log = default_log("sen2tools.catalog")
+
+# Catalogue database kept in the root of an output folder, and the per-product sidecar written next to each output.
+CATALOG_FILE = "catalog.sqlite"
+SIDECAR_SUFFIX = ".catalog.json"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    name TEXT NOT NULL,
+    mission TEXT,
+    orbit TEXT,
+    tiles TEXT,
+    aoi TEXT,
+    sensing_start TEXT,
+    resolution INTEGER,
+    valid_fraction REAL,
+    xmin REAL, ymin REAL, xmax REAL, ymax REAL,
+    bands TEXT,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS products_sensing ON products (sensing_start);
+CREATE INDEX IF NOT EXISTS products_aoi ON products (aoi);
+"""
+# Spatial-temporal index: longitude, latitude and sensing time (epoch seconds) ranges per product.
+_RTREE_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS products_rtree USING rtree(id, xmin, xmax, ymin, ymax, tmin, tmax)"
+
+_lock = threading.Lock()
+
+
+# Function: _epoch
+# Description: Convert an ISO 8601 UTC timestamp (e.g. 2024-06-15T10:00:31Z) to epoch seconds.
+def _epoch(iso_time):
+    return datetime.strptime(iso_time[:19], "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc).timestamp()
+
+
+# Function: _day_range
+# Description: Convert a date_from/date_to pair (YYYY-MM-DD, inclusive) to ISO bounds for comparison.
+def _day_range(date_from, date_to):
+    return (f"{date_from}T00:00:00" if date_from else None), (f"{date_to}T23:59:59" if date_to else None)
+
+
+# Function: _like_escape
+# Description: Escape LIKE wildcards (band names contain "_").
+def _like_escape(value):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Class: OutputCatalog
+# Description: SQLite catalogue of processed products in one output folder. Each product is a row with its footprint,
+#   sensing time, processing parameters, band list, valid-pixel fraction and path (relative to the folder); an
+#   R-tree over longitude/latitude/time answers spatial-temporal queries without opening any product. The JSON
+#   sidecars next to the outputs are the source of truth, so the catalogue can be rebuilt from the output tree.
+#   Thread-safe (one connection per call); Qt-free.
+class OutputCatalog:
+    # Function: __init__
+    # Params: folder (str, output folder holding the catalogue).
+    def __init__(self, folder):
+        self.folder = os.path.abspath(folder)
+        self.db_path = os.path.join(self.folder, CATALOG_FILE)
+        self.has_rtree = True
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            try:
+                conn.execute(_RTREE_SCHEMA)
+            except sqlite3.OperationalError:
+                self.has_rtree = False  # SQLite built without R*Tree: bounding boxes are filtered from products
+
+    # Function: _connect
+    # Description: Open a connection for one operation; commits on success and always closes it.
+    @contextlib.contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # Function: add
+    # Description: Insert or replace the record of one output product.
+    # Params: record (dict from build_record; "path" relative to the catalogue folder).
+    def add(self, record):
+        path = record["path"]
+        bbox = record.get("bbox") or [None] * 4
+        with _lock, self._connect() as conn:
+            row = conn.execute("SELECT id FROM products WHERE path = ?", (path,)).fetchone()
+            if row is not None:
+                conn.execute("DELETE FROM products WHERE id = ?", (row["id"],))
+                if self.has_rtree:
+                    conn.execute("DELETE FROM products_rtree WHERE id = ?", (row["id"],))
+            cursor = conn.execute(
+                "INSERT INTO products (path, name, mission, orbit, tiles, aoi, sensing_start, resolution,"
+                " valid_fraction, xmin, ymin, xmax, ymax, bands, record)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, record["name"], record.get("mission"), record.get("orbit"),
+                 ",".join(record.get("tiles") or []), record.get("aoi"), record.get("sensing_start"),
+                 record.get("resolution"), record.get("valid_fraction"), *bbox,
+                 ",".join(record.get("bands") or []), json.dumps(record, ensure_ascii=False))
+            )
+            if self.has_rtree and record.get("bbox") and record.get("sensing_start"):
+                t = _epoch(record["sensing_start"])
+                xmin, ymin, xmax, ymax = record["bbox"]
+                conn.execute("INSERT INTO products_rtree VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             (cursor.lastrowid, xmin, xmax, ymin, ymax, t, t))
+
+    # Function: query
+    # Description: Find products matching all given criteria.
+    # Params: bbox (optional (xmin, ymin, xmax, ymax) in WGS84, products intersecting it), date_from, date_to
+    #   (optional YYYY-MM-DD, inclusive), min_valid_fraction (optional float), band (optional band name, e.g.
+    #   "conc_chl"), aoi (optional AOI name), tile (optional tile ID, e.g. "33UVR").
+    # Returns: list of record dicts (with absolute "path"), ordered by sensing time.
+    def query(self, bbox=None, date_from=None, date_to=None, min_valid_fraction=None, band=None, aoi=None,
+              tile=None):
+        time_from, time_to = _day_range(date_from, date_to)
+        joins, where, args = "", [], []
+        if bbox is not None and self.has_rtree:
+            joins = " JOIN products_rtree r ON r.id = p.id"
+            where += ["r.xmax >= ?", "r.xmin <= ?", "r.ymax >= ?", "r.ymin <= ?"]
+            args += [bbox[0], bbox[2], bbox[1], bbox[3]]
+            # The R-tree stores 32-bit floats (~2 min precision for epoch seconds): pre-filter with a day of margin.
+            if time_from:
+                where.append("r.tmax >= ?")
+                args.append(_epoch(time_from) - 86400)
+            if time_to:
+                where.append("r.tmin <= ?")
+                args.append(_epoch(time_to) + 86400)
+        elif bbox is not None:
+            where += ["p.xmax >= ?", "p.xmin <= ?", "p.ymax >= ?", "p.ymin <= ?"]
+            args += [bbox[0], bbox[2], bbox[1], bbox[3]]
+        # Exact time bounds
+        if time_from:
+            where.append("p.sensing_start >= ?")
+            args.append(time_from)
+        if time_to:
+            where.append("p.sensing_start <= ?")
+            args.append(time_to)
+        if min_valid_fraction is not None:
+            where.append("p.valid_fraction >= ?")
+            args.append(min_valid_fraction)
+        if band:
+            where.append("(',' || p.bands || ',') LIKE ? ESCAPE '\\'")
+            args.append(f"%,{_like_escape(band)},%")
+        if aoi:
+            where.append("p.aoi = ?")
+            args.append(aoi)
+        if tile:
+            where.append("(',' || p.tiles || ',') LIKE ? ESCAPE '\\'")
+            args.append(f"%,{_like_escape(tile)},%")
+        sql = "SELECT p.path, p.record FROM products p" + joins
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY p.sensing_start, p.name"
+        with self._connect() as conn:
+            rows = conn.execute(sql, args).fetchall()
+        records = []
+        for row in rows:
+            record = json.loads(row["record"])
+            record["path"] = os.path.normpath(os.path.join(self.folder, row["path"]))
+            records.append(record)
+        return records
+
+    # Function: count
+    # Description: Return the number of catalogued products.
+    def count(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    # Function: rebuild
+    # Description: Recreate the catalogue from the output tree: every sidecar is re-indexed; BEAM-DIMAP products
+    #   without a sidecar (written before the catalogue existed) are indexed from their .dim header and name,
+    #   without footprint and valid-pixel fraction.
+    # Returns: number of catalogued products.
+    def rebuild(self, log=None):
+        log = log or _log
+        with _lock, self._connect() as conn:
+            conn.execute("DELETE FROM products")
+            if self.has_rtree:
+                conn.execute("DELETE FROM products_rtree")
+        sidecars = set()
+        dim_paths = []
+        for root, dirs, files in os.walk(self.folder):
+            dirs[:] = [name for name in dirs if not name.startswith(TEMP_PREFIX)]  # unfinished writes
+            dim_paths += [os.path.join(root, name) for name in files if name.endswith(".dim")]
+            for name in files:
+                if name.endswith(SIDECAR_SUFFIX):
+                    path = os.path.join(root, name)
+                    sidecars.add(path[:-len(SIDECAR_SUFFIX)])
+                    with open(path, encoding="utf-8") as f:
+                        record = json.load(f)
+                    record["path"] = os.path.relpath(path[:-len(SIDECAR_SUFFIX)], self.folder)
+                    self.add(record)
+        for dim_path in dim_paths:
+            output_path = dim_path[:-len(".dim")]
+            if output_path not in sidecars:
+                record = record_from_dim(dim_path)
+                record["path"] = os.path.relpath(output_path, self.folder)
+                self.add(record)
+        count = self.count()
+        log(f"🗂️ Katalog výstupů obnoven: {count} produktů ({self.db_path})")
+        return count
+
+
+# Function: build_record
+# Description: Assemble the catalogue record of one output product.
+# Params: output_path (str, without extension), safe_paths (list of input .SAFE paths), aoi_path (shapefile or None),
+#   resolution (int, metres), parameters (dict of C2RCC parameters and output flags), bands (list of str),
+#   bbox ((xmin, ymin, xmax, ymax) WGS84 footprint or None), valid_fraction (float or None),
+#   sensing_start (ISO UTC time or None; derived from the product name when missing), format_name (str).
+def build_record(output_path, safe_paths, aoi_path, resolution, parameters, bands, bbox, valid_fraction,
+                 sensing_start=None, format_name="BEAM-DIMAP"):
+    infos = [info for info in (tile_grouping.parse_product_name(path) for path in safe_paths) if info]
+    first = infos[0] if infos else {}
+    if not sensing_start and first:
+        sensing_start = datetime.strptime(first["sensing"], "%Y%m%dT%H%M%S").strftime("%Y-%m-%dT%H:%M:%SZ")
+    return {
+        "name": os.path.basename(output_path),
+        "path": output_path,
+        "format": format_name,
+        "mission": first.get("mission"),
+        "level": first.get("level"),
+        "orbit": first.get("orbit"),
+        "tiles": sorted({info["tile"] for info in infos}),
+        "inputs": [os.path.basename(os.path.normpath(path)) for path in safe_paths],
+        "aoi": os.path.splitext(os.path.basename(aoi_path))[0] if aoi_path else None,
+        "sensing_start": sensing_start,
+        "resolution": resolution,
+        "parameters": parameters,
+        "bands": list(bands),
+        "bbox": [round(value, 6) for value in bbox] if bbox else None,
+        "valid_fraction": None if valid_fraction is None else round(valid_fraction, 4),
+        "written_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+
+
+# Function: record_output
+# Description: Write the sidecar of an output product and add it to the catalogue of its folder.
+# Params: record (dict from build_record, "path" is the output path without extension).
+def record_output(record):
+    output_path = record["path"]
+    folder = os.path.dirname(os.path.abspath(output_path))
+    sidecar = dict(record, path=os.path.basename(output_path))
+    with open(output_path + SIDECAR_SUFFIX, "w", encoding="utf-8") as f:
+        json.dump(sidecar, f, ensure_ascii=False, indent=2)
+    OutputCatalog(folder).add(dict(record, path=os.path.basename(output_path)))
+
+
+# Function: record_from_dim
+# Description: Build a partial record from a BEAM-DIMAP header (bands, start time) and the product name; names
+#   without a "_NNm" suffix were written at DEFAULT_RESOLUTION.
+def record_from_dim(dim_path):
+    output_path = dim_path[:-len(".dim")]
+    root = ET.parse(dim_path).getroot()
+    bands = [element.text for element in root.iter("BAND_NAME") if element.text]
+    start = root.findtext(".//PRODUCT_SCENE_RASTER_START_TIME")
+    sensing_start = None
+    if start:
+        try:
+            sensing_start = datetime.strptime(start.strip()[:20], "%d-%b-%Y %H:%M:%S").strftime("%Y-%m-%dT%H:%M:%SZ")
+        except ValueError:
+            pass
+    name = os.path.basename(output_path)
+    safe_name = re.sub(r"_C2RCC(_\d+m)?$", "", name)
+    resolution = re.search(r"_(\d+)m$", name)
+    return build_record(output_path, [safe_name], None, int(resolution.group(1)) if resolution else DEFAULT_RESOLUTION,
+                        None, bands, None, None, sensing_start)
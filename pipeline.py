@@ -0,0 +1,173 @@
+# pipeline.py
+import logging
+import os
+import threading
+
+import c2rcc_core
+import tile_grouping
+from job_engine import get_scheduler, JobGroup, JobCancelled, DISK, SNAP, PRIORITY_HIGH, DONE
+from log_util import default_log
+from storage_manager import get_storage_manager
+
+_log = default_log("sen2tools.pipeline")
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Class: DownloadProcessPipeline
+# Description: Streams downloaded products into C2RCC processing while the rest of the batch is still downloading.
+#   The downloader hands over each verified .zip via submit(); each product is extracted to .SAFE by a job in the
+#   DISK pool of the shared scheduler, which then queues a job in the SNAP pool running c2rcc_core.process_unit.
+#   At most max_queued units are being extracted or wait for processing, so submit() blocks (back-pressure) when
+#   processing falls behind; disk space and retention (deleting the zip after extraction and the .SAFE after
+#   processing) are handled by the shared StorageManager (storage_manager.py). With mosaicking enabled, products
+#   of the same datatake are held back until all expected tiles have arrived and are processed as one group.
+#   Qt-free; used by the GUI and the CLI.
+class DownloadProcessPipeline:
+    # Function: __init__
+    # Params: settings_provider (callable returning the processing settings dict with keys output_folder,
+    #   shapefile, mosaic, outputs, resolution, triage, min_valid_fraction), log (optional callable for status
+    #   messages), on_finished (optional callable(group) called when a batch is fully processed),
+    #   max_queued (int, max products waiting for processing).
+    def __init__(self, settings_provider, log=None, on_finished=None, max_queued=2):
+        self.settings_provider = settings_provider
+        self.log = log or _log
+        self.on_finished = on_finished
+        self.max_queued = max_queued
+        self.scheduler = get_scheduler()
+        self.storage = get_storage_manager()
+        self.settings = None
+        self.slots = None
+        self.group = None
+        self.waiting = {}  # datatake key -> {"expected": int, "zips": [str]}
+        self._lock = threading.Lock()
+
+    # Function: is_running
+    # Description: Return True while a batch is being fed or processed.
+    def is_running(self):
+        return self.group is not None and not self.group.is_finished()
+
+    # Function: start
+    # Description: Snapshot and validate the processing settings and open a new batch.
+    # Params: expected_names (optional list of product names in the batch, used to group tiles of one datatake).
+    # Returns: None on success, otherwise a translation key describing the error.
+    def start(self, expected_names=None):
+        if self.is_running():
+            return "pipeline_busy"
+        settings = self.settings_provider()
+        if not os.path.isdir(settings["output_folder"]):
+            return "invalid_output"
+
+        self.settings = settings
+        self.slots = threading.BoundedSemaphore(self.max_queued)
+        self.group = JobGroup("pipeline", on_finished=self._batch_finished)
+        self.waiting = {}
+        if settings.get("mosaic") and settings.get("shapefile") and os.path.exists(settings["shapefile"]):
+            for name in expected_names or []:
+                entry = self.waiting.setdefault(tile_grouping.datatake_key(name), {"expected": 0, "zips": []})
+                entry["expected"] += 1
+        return None
+
+    # Function: submit
+    # Description: Hand over a downloaded and verified .zip for processing. Tiles of a datatake with more expected
+    #   members are held until the last one arrives and then processed together.
+    #   Blocks while max_queued units are already waiting; gives up if the calling job gets cancelled.
+    # Params: zip_path (str), job (optional calling Job, used for cooperative cancel while waiting).
+    def submit(self, zip_path, job=None):
+        with self._lock:
+            entry = self.waiting.get(tile_grouping.datatake_key(zip_path))
+            if entry is None:
+                zip_paths = [zip_path]
+            else:
+                entry["zips"].append(zip_path)
+                if len(entry["zips"]) < entry["expected"]:
+                    self.log(f"⏳ Čekám na další dlaždice přeletu: {os.path.basename(zip_path)}", logging.DEBUG)
+                    return
+                del self.waiting[tile_grouping.datatake_key(zip_path)]
+                zip_paths = entry["zips"]
+        self._submit_unit(zip_paths, job)
+
+    # Function: finish
+    # Description: Signal that the download batch is complete; incomplete datatake groups (e.g. a failed tile)
+    #   are processed with the tiles that did arrive. Completion is reported once all jobs finish.
+    def finish(self):
+        with self._lock:
+            leftovers = [entry["zips"] for entry in self.waiting.values() if entry["zips"]]
+            self.waiting = {}
+        for zip_paths in leftovers:
+            self._submit_unit(zip_paths)
+        self.group.close()
+
+    # Function: _submit_unit
+    # Description: Queue the extraction of a list of .zip files (one product or one datatake group); the extraction
+    #   job queues the processing job. The back-pressure slot is held until processing is finished.
+    def _submit_unit(self, zip_paths, job=None):
+        while not self.slots.acquire(timeout=0.5):
+            if job is not None:
+                job.checkpoint()
+        name = " + ".join(os.path.basename(path) for path in zip_paths)
+        extract_job = self.scheduler.submit(
+            f"Rozbalení: {name}", self._extract, zip_paths,
+            resource=DISK, priority=PRIORITY_HIGH, key=f"extract:{zip_paths[0]}", group=self.group
+        )
+        if extract_job is None:
+            self.slots.release()
+        else:
+            extract_job.add_done_callback(self._extract_finished)
+
+    # Function: _extract_finished
+    # Description: Release the back-pressure slot of a unit whose extraction failed or was cancelled (otherwise the
+    #   processing job releases it).
+    def _extract_finished(self, job):
+        if job.state != DONE:
+            self.slots.release()
+
+    # Function: _extract
+    # Description: DISK job body: extract the products, apply the zip retention rule and queue their processing.
+    def _extract(self, job, zip_paths):
+        try:
+            safe_paths = []
+            for i, zip_path in enumerate(zip_paths):
+                job.checkpoint()
+                self.log(f"📦 Rozbaluji: {zip_path}")
+                job.set_progress(i / len(zip_paths), "extract")
+                safe_paths.append(c2rcc_core.extract_safe(zip_path, job, self.log))
+                self.storage.after_extract(zip_path, self.log)
+        except JobCancelled:
+            raise
+        except Exception as e:
+            self.log(f"❌ Chyba při rozbalování {', '.join(zip_paths)}: {e}", logging.ERROR)
+            raise
+
+        name = " + ".join(os.path.basename(path) for path in safe_paths)
+        processing_job = self.scheduler.submit(
+            f"C2RCC: {name}", self._process, safe_paths,
+            resource=SNAP, priority=PRIORITY_HIGH, key=f"c2rcc:{safe_paths[0]}", group=self.group
+        )
+        if processing_job is None:
+            self.slots.release()
+        else:
+            processing_job.add_done_callback(lambda _: self.slots.release())
+        return safe_paths
+
+    # Function: _process
+    # Description: SNAP job body: run the C2RCC chain on the extracted products (mosaicked if grouped) and apply
+    #   the .SAFE retention rule of the storage manager once an output was written (inputs rejected by triage or
+    #   not covering the AOI are kept).
+    def _process(self, job, safe_paths):
+        try:
+            c2rcc_core.init_snap(self.log)
+            outputs = c2rcc_core.process_unit(safe_paths, self.settings, job, self.log)
+            if outputs:
+                self.storage.after_process(safe_paths, self.log)
+            return outputs
+        except JobCancelled:
+            raise
+        except Exception as e:
+            self.log(f"❌ Chyba při zpracování {', '.join(safe_paths)}: {e}", logging.ERROR)
+            raise
+
+    # Function: _batch_finished
+    # Description: Report the result of the batch once all processing jobs are finished.
+    def _batch_finished(self, group):
+        if self.on_finished:
+            self.on_finished(group)
@@ -0,0 +1,82 @@
+# quicklook_cache.py
+import os
+import re
+import threading
+
+# Default cache location and size limit.
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".sen2tools", "quicklooks")
+DEFAULT_MAX_BYTES = 200 * 1024 ** 2
+
+QUICKLOOK_EXT = ".jpg"
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Class: QuicklookCache
+# Description: On-disk cache of product quicklooks keyed by CDSE product ID, with size-based LRU eviction.
+#   The file modification time is the LRU key: it is refreshed on every hit, and the oldest files are deleted
+#   once the total size exceeds max_bytes. Thread-safe; Qt-free.
+class QuicklookCache:
+    # Function: __init__
+    # Params: folder (str, cache directory), max_bytes (int, size limit of the cache).
+    def __init__(self, folder=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+        self._total = sum(entry.stat().st_size for entry in os.scandir(folder) if entry.is_file())
+
+    # Function: path_for
+    # Description: Return the cache file path of a product ID (IDs are UUIDs; anything else is sanitised).
+    def path_for(self, product_id):
+        return os.path.join(self.folder, re.sub(r"[^0-9A-Za-z_-]", "_", product_id) + QUICKLOOK_EXT)
+
+    # Function: get
+    # Description: Return the cached quicklook path, or None on a miss. A hit marks the entry as recently used.
+    def get(self, product_id):
+        path = self.path_for(product_id)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    # Function: put
+    # Description: Store quicklook bytes for a product and evict least recently used entries over the limit.
+    # Returns: path of the cached file.
+    def put(self, product_id, data):
+        path = self.path_for(product_id)
+        tmp_path = path + ".part"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        with self._lock:
+            if os.path.exists(path):
+                self._total -= os.path.getsize(path)
+            os.replace(tmp_path, path)
+            self._total += len(data)
+            if self._total > self.max_bytes:
+                self._evict(keep=path)
+        return path
+
+    # Function: size
+    # Description: Return the current total size of the cache in bytes.
+    def size(self):
+        return self._total
+
+    # Function: _evict
+    # Description: Delete least recently used files until the cache fits into max_bytes (caller holds the lock).
+    def _evict(self, keep):
+        entries = sorted(
+            (entry for entry in os.scandir(self.folder) if entry.is_file() and entry.name.endswith(QUICKLOOK_EXT)),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in entries:
+            if self._total <= self.max_bytes:
+                break
+            if entry.path == keep:
+                continue
+            size = entry.stat().st_size
+            try:
+                os.remove(entry.path)
+                self._total -= size
+            except OSError:
+                pass
@@ -0,0 +1,375 @@
+# sen2tools_cli.py
+# Headless command-line entry point for search, download and C2RCC processing (no Qt required).
+#
+# Usage:
+#   python sen2tools_cli.py run job.json [--steps search,download,process] [--network-workers N] [--snap-workers N]
+#   python sen2tools_cli.py catalog query OUTPUT_FOLDER [--bbox xmin,ymin,xmax,ymax | --shapefile aoi.shp]
+#                                        [--from 2024-06-01] [--to 2024-06-30] [--min-valid 0.5] [--band conc_chl]
+#   python sen2tools_cli.py catalog rebuild OUTPUT_FOLDER
+#
+# The job file is JSON, e.g.:
+#   {
+#     "credentials": {"username": "user@example.com", "password": "..."},
+#     "search": {"shapefile": "aoi.shp", "date_from": "2024-06-01", "date_to": "2024-06-30",
+#                "cloud_cover": 20, "product_type": "Level-1C"},
+#     "download": {"folder": "/data/l1c"},
+#     "process": {"input_folder": "/data/l1c", "output_folder": "/data/c2rcc", "shapefile": "aoi.shp",
+#                 "mosaic": true, "resolution": 10, "triage": true, "min_valid_fraction": 0.1,
+#                 "outputs": {"outputUncertainties": true}},
+#     "storage": {"min_free_gb": 5, "delete_zip": true, "delete_safe": false},
+#     "workers": {"network": 4, "snap": 2}
+#   }
+# Credentials may also be given via the CDSE_USERNAME / CDSE_PASSWORD environment variables. An optional
+# "endpoints": {"token_url": ..., "catalogue_url": ...} section (or CDSE_TOKEN_URL / CDSE_CATALOGUE_URL) points
+# the client at another CDSE instance, e.g. the local stand-in server benchmarks/mock_cdse.py.
+# When both download and process are run, every product is processed as soon as it is downloaded (pipeline).
+# The download step downloads the products found by the search step, so it requires it.
+# Progress is streamed to stdout as JSON lines: {"ts": ..., "event": "log"|"job"|"step"|"error"|"summary", ...}.
+# Exit codes: 0 all jobs done, 1 some jobs failed, 2 invalid job file, 3 login or search failed.
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+from job_engine import get_scheduler, JobGroup, NETWORK, SNAP, DONE, FAILED, CANCELLED, FINISHED_STATES
+
+STEPS = ("search", "download", "process")
+
+# Exit codes
+EXIT_OK = 0
+EXIT_FAILED_JOBS = 1
+EXIT_CONFIG_ERROR = 2
+EXIT_SERVICE_ERROR = 3  # login or search failed (credentials, unreadable shapefile, CDSE unavailable)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Class: ProgressReporter
+# Description: Writes structured progress events as JSON lines to a stream and periodically reports job changes.
+class ProgressReporter:
+    # Function: __init__
+    # Params: stream (file-like, default stdout), interval (float, seconds between job progress reports),
+    #   level (minimum logging level of "log" events).
+    def __init__(self, stream=None, interval=2.0, level=logging.INFO):
+        self.stream = stream or sys.stdout
+        self.interval = interval
+        self.level = level
+        self._lock = threading.Lock()
+        self._last = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    # Function: emit
+    # Description: Write one event as a JSON line.
+    def emit(self, event, **fields):
+        record = {"ts": round(time.time(), 3), "event": event}
+        record.update(fields)
+        with self._lock:
+            self.stream.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            self.stream.flush()
+
+    # Function: log
+    # Description: Log callable passed to the core modules.
+    # Params: message (str), level (logging level, default INFO).
+    def log(self, message, level=logging.INFO):
+        if level >= self.level:
+            self.emit("log", level=logging.getLevelName(level), message=message)
+
+    # Function: start
+    # Description: Start the background thread reporting job state/progress changes.
+    def start(self, scheduler):
+        self._thread = threading.Thread(target=self._watch, args=(scheduler,), daemon=True)
+        self._thread.start()
+
+    # Function: stop
+    # Description: Stop the watcher and report the final state of all jobs.
+    def stop(self, scheduler):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self._report_jobs(scheduler)
+
+    def _watch(self, scheduler):
+        while not self._stop.wait(self.interval):
+            self._report_jobs(scheduler)
+
+    def _report_jobs(self, scheduler):
+        for job in scheduler.jobs():
+            snapshot = (job.state, round(job.progress, 2), job.message)
+            if self._last.get(job.id) == snapshot:
+                continue
+            self._last[job.id] = snapshot
+            fields = {"id": job.id, "name": job.name, "resource": job.resource, "state": job.state,
+                      "progress": round(job.progress, 3), "message": job.message}
+            if job.state in FINISHED_STATES and job.started_at:
+                fields["duration_s"] = round(job.finished_at - job.started_at, 2)
+            self.emit("job", **fields)
+
+
+# Function: load_config
+# Description: Read the JSON job file and fill credentials from the environment when missing.
+def load_config(path):
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    credentials = config.setdefault("credentials", {})
+    credentials.setdefault("username", os.environ.get("CDSE_USERNAME", ""))
+    credentials.setdefault("password", os.environ.get("CDSE_PASSWORD", ""))
+    return config
+
+
+# Function: processing_settings
+# Description: Build the processing settings dict used by c2rcc_core / DownloadProcessPipeline.
+def processing_settings(process_config):
+    return {
+        "output_folder": process_config.get("output_folder", ""),
+        "shapefile": process_config.get("shapefile", ""),
+        "mosaic": process_config.get("mosaic", True),
+        "resolution": process_config.get("resolution", 10),
+        "triage": process_config.get("triage", False),
+        "min_valid_fraction": process_config.get("min_valid_fraction", 0.1),
+        "outputs": process_config.get("outputs", {}),
+    }
+
+
+# Function: configure_storage
+# Description: Apply the free-space watermark and retention rules of the job file to the shared storage manager.
+#   Retention only applies when downloaded products are processed in the same run (pipeline mode).
+def configure_storage(storage_config, pipeline_mode):
+    from storage_manager import get_storage_manager, DEFAULT_MIN_FREE_BYTES
+    get_storage_manager().configure(
+        min_free_bytes=storage_config.get("min_free_gb", DEFAULT_MIN_FREE_BYTES / 1024 ** 3) * 1024 ** 3,
+        delete_zip_after_extract=pipeline_mode and storage_config.get("delete_zip", False),
+        delete_safe_after_process=pipeline_mode and storage_config.get("delete_safe", False)
+    )
+
+
+# Function: wait_for_group
+# Description: Close the group and block until all of its jobs are finished.
+def wait_for_group(group):
+    finished = threading.Event()
+    group.on_finished = lambda _: finished.set()
+    group.close()
+    finished.wait()
+
+
+# Function: run_search
+# Description: Search step. Returns the list of found products.
+def run_search(config, token, reporter):
+    import cdse_client
+    search = config["search"]
+    products = cdse_client.search_products(
+        token, search["shapefile"], search["date_from"], search["date_to"],
+        search.get("cloud_cover", 20), search.get("product_type", "Level-1C"), log=reporter.log
+    )
+    reporter.emit("step", step="search", products=[p["Name"] for p in products])
+    return products
+
+
+# Function: run_download
+# Description: Download step; with a pipeline every downloaded product is queued for processing right away.
+# Returns: list of finished download jobs.
+def run_download(config, token, products, reporter, pipeline=None):
+    import cdse_client
+    folder = config["download"]["folder"]
+    os.makedirs(folder, exist_ok=True)
+
+    def download(job, product):
+        file_path = cdse_client.download_product(token, product, folder, job, reporter.log)
+        if pipeline is not None:
+            pipeline.submit(file_path, job)
+        return file_path
+
+    scheduler = get_scheduler()
+    group = JobGroup("download")
+    for product in products:
+        scheduler.submit(f"Stahování: {product['Name']}", download, product,
+                         resource=NETWORK, key=f"download:{product['Id']}", group=group)
+    wait_for_group(group)
+    reporter.emit("step", step="download", done=group.count(DONE), failed=group.count(FAILED))
+    return group.jobs
+
+
+# Function: run_process
+# Description: Processing step over all .SAFE products of the input folder.
+# Returns: list of finished processing jobs.
+def run_process(config, reporter):
+    import c2rcc_core
+    process = config["process"]
+    settings = processing_settings(process)
+    input_folder = process.get("input_folder") or config.get("download", {}).get("folder", "")
+    os.makedirs(settings["output_folder"], exist_ok=True)
+
+    def process_job(job, safe_paths):
+        c2rcc_core.init_snap(reporter.log)
+        return c2rcc_core.process_unit(safe_paths, settings, job, reporter.log)
+
+    scheduler = get_scheduler()
+    group = JobGroup("c2rcc")
+    for safe_paths in c2rcc_core.plan_jobs(c2rcc_core.find_safe_products(input_folder), settings):
+        name = " + ".join(os.path.basename(path) for path in safe_paths)
+        scheduler.submit(f"C2RCC: {name}", process_job, safe_paths,
+                         resource=SNAP, key=f"c2rcc:{safe_paths[0]}", group=group)
+    wait_for_group(group)
+    reporter.emit("step", step="process", done=group.count(DONE), failed=group.count(FAILED))
+    return group.jobs
+
+
+# Function: run
+# Description: Execute the requested steps of a job file. Returns the process exit code.
+def run(args):
+    config = load_config(args.config)
+    steps = [s for s in args.steps.split(",") if s] if args.steps else [s for s in STEPS if s in config]
+    unknown = [s for s in steps if s not in STEPS]
+    if unknown:
+        print(f"Neznámé kroky: {', '.join(unknown)}", file=sys.stderr)
+        return EXIT_CONFIG_ERROR
+    if "download" in steps and "search" not in steps:
+        print("Krok download vyžaduje krok search (seznam produktů ke stažení).", file=sys.stderr)
+        return EXIT_CONFIG_ERROR
+
+    workers = dict(config.get("workers", {}))
+    if args.network_workers:
+        workers[NETWORK] = args.network_workers
+    if args.snap_workers:
+        workers[SNAP] = args.snap_workers
+    scheduler = get_scheduler(workers)
+    configure_storage(config.get("storage", {}), pipeline_mode="download" in steps and "process" in steps)
+
+    reporter = ProgressReporter(interval=args.progress_interval, level=logging.getLevelName(args.log_level))
+    reporter.emit("start", steps=steps, workers=scheduler.pool_sizes)
+    reporter.start(scheduler)
+    started = time.time()
+    jobs = []
+    try:
+        token = None
+        products = []
+        if "search" in steps:
+            import cdse_client
+            search = config.get("search", {})
+            folder = os.getcwd()
+            if "download" in steps:
+                folder = config.get("download", {}).get("folder", "")
+                try:
+                    os.makedirs(folder, exist_ok=True)
+                except OSError:
+                    pass  # reported by the validation below
+            errors = cdse_client.validate_search_params(
+                search.get("date_from", ""), search.get("date_to", ""), search.get("cloud_cover", 20),
+                search.get("shapefile", ""), folder
+            )
+            if errors:
+                reporter.emit("error", errors=errors)
+                return EXIT_CONFIG_ERROR
+            endpoints = config.get("endpoints", {})
+            cdse_client.configure_endpoints(endpoints.get("token_url"), endpoints.get("catalogue_url"))
+            credentials = config["credentials"]
+            try:
+                token = cdse_client.get_keycloak_token(credentials["username"], credentials["password"])
+                products = run_search(config, token, reporter)
+            except Exception as e:
+                reporter.emit("error", errors=[f"{type(e).__name__}: {e}"])
+                return EXIT_SERVICE_ERROR
+
+        if "download" in steps and "process" in steps:
+            from pipeline import DownloadProcessPipeline
+            pipeline_done = threading.Event()
+            pipeline = DownloadProcessPipeline(lambda: processing_settings(config["process"]),
+                                               log=reporter.log, on_finished=lambda _: pipeline_done.set())
+            os.makedirs(config["process"]["output_folder"], exist_ok=True)
+            error = pipeline.start([product["Name"] for product in products])
+            if error:
+                reporter.emit("error", errors=[error])
+                return EXIT_CONFIG_ERROR
+            jobs += run_download(config, token, products, reporter, pipeline)
+            pipeline.finish()
+            pipeline_done.wait()
+            jobs += pipeline.group.jobs
+        elif "download" in steps:
+            jobs += run_download(config, token, products, reporter)
+        elif "process" in steps:
+            jobs += run_process(config, reporter)
+    finally:
+        reporter.stop(scheduler)
+
+    failed = sum(1 for job in jobs if job.state in (FAILED, CANCELLED))
+    reporter.emit("summary", jobs=len(jobs), done=sum(1 for job in jobs if job.state == DONE), failed=failed,
+                  elapsed_s=round(time.time() - started, 2))
+    return EXIT_FAILED_JOBS if failed else EXIT_OK
+
+
+# Function: catalog
+# Description: Query or rebuild the catalogue of processed outputs (output_catalog.py). Query results are written
+#   to stdout as JSON lines, one product per line. Returns the process exit code.
+def catalog(args):
+    from output_catalog import OutputCatalog
+    if not os.path.isdir(args.folder):
+        print(f"Složka neexistuje: {args.folder}", file=sys.stderr)
+        return EXIT_CONFIG_ERROR
+    output_catalog = OutputCatalog(args.folder)
+    if args.catalog_command == "rebuild":
+        count = output_catalog.rebuild(log=lambda message, level=logging.INFO: print(message, file=sys.stderr))
+        print(json.dumps({"event": "summary", "products": count}))
+        return EXIT_OK
+
+    bbox = None
+    if args.bbox:
+        bbox = tuple(float(value) for value in args.bbox.split(","))
+        if len(bbox) != 4:
+            print("--bbox očekává xmin,ymin,xmax,ymax", file=sys.stderr)
+            return EXIT_CONFIG_ERROR
+    elif args.shapefile:
+        import cdse_client
+        import shapefile_reader
+        bbox = shapefile_reader.wkt_bounds(cdse_client.get_wkt_from_shapefile(args.shapefile, lambda *_: None))
+    for record in output_catalog.query(bbox, args.date_from, args.date_to, args.min_valid, args.band, args.aoi,
+                                       args.tile):
+        print(json.dumps(record, ensure_ascii=False))
+    return EXIT_OK
+
+
+# Function: build_parser
+# Description: Build the argument parser of the CLI.
+def build_parser():
+    parser = argparse.ArgumentParser(prog="sen2tools", description="Headless Sentinel-2 download and C2RCC processing.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run steps of a JSON job file.")
+    run_parser.add_argument("config", help="Path to the JSON job file.")
+    run_parser.add_argument("--steps", help="Comma separated steps to run (search,download,process). "
+                                            "Default: all steps present in the job file.")
+    run_parser.add_argument("--network-workers", type=int, help="Parallel downloads.")
+    run_parser.add_argument("--snap-workers", type=int, help="Parallel C2RCC jobs.")
+    run_parser.add_argument("--progress-interval", type=float, default=2.0,
+                            help="Seconds between job progress events.")
+    run_parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                            help="Minimum level of log events.")
+    run_parser.set_defaults(func=run)
+
+    catalog_parser = subparsers.add_parser("catalog", help="Query or rebuild the catalogue of processed outputs.")
+    catalog_subparsers = catalog_parser.add_subparsers(dest="catalog_command", required=True)
+    query_parser = catalog_subparsers.add_parser("query", help="Print matching products as JSON lines.")
+    query_parser.add_argument("folder", help="Output folder with catalog.sqlite.")
+    area = query_parser.add_mutually_exclusive_group()
+    area.add_argument("--bbox", help="WGS84 bounding box xmin,ymin,xmax,ymax the footprint must intersect.")
+    area.add_argument("--shapefile", help="Shapefile whose bounding box the footprint must intersect.")
+    query_parser.add_argument("--from", dest="date_from", help="First sensing date (YYYY-MM-DD).")
+    query_parser.add_argument("--to", dest="date_to", help="Last sensing date (YYYY-MM-DD), inclusive.")
+    query_parser.add_argument("--min-valid", type=float, help="Minimal share of valid water pixels (0-1).")
+    query_parser.add_argument("--band", help="Band the product must contain, e.g. conc_chl.")
+    query_parser.add_argument("--aoi", help="AOI (shapefile) name used for processing.")
+    query_parser.add_argument("--tile", help="Sentinel-2 tile, e.g. 33UVR.")
+    rebuild_parser = catalog_subparsers.add_parser("rebuild", help="Rebuild the catalogue from the output tree.")
+    rebuild_parser.add_argument("folder", help="Output folder to scan.")
+    catalog_parser.set_defaults(func=catalog)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
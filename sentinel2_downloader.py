@@ -1,27 +1,32 @@
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, 
-                              QPushButton, QFrame, QComboBox, QTextEdit, QFileDialog, 
-                              QMessageBox, QGroupBox)
-from PySide6.QtGui import QPixmap
-from PySide6.QtCore import Qt, Signal, QObject
-import requests
-import geopandas as gpd
-from shapely.geometry import box
-from datetime import datetime
+                              QPushButton, QFrame, QComboBox, QPlainTextEdit, QFileDialog, 
+                              QMessageBox, QGroupBox, QCheckBox, QListWidget, QListWidgetItem, QSpinBox)
+from PySide6.QtGui import QPixmap, QIcon
+from PySide6.QtCore import Qt, Signal, QObject, QSize
+import logging
 import os
-import threading
-import re
 import webbrowser
 from translations import translations
+from log_sink import LogSink, LEVELS
+from quicklook_cache import QuicklookCache
+import cdse_client
+from job_engine import get_scheduler, JobGroup, JobCancelled, NETWORK, INTERACTIVE, PRIORITY_HIGH, DONE
+from storage_manager import get_storage_manager
+
+# Size (px) of quicklook icons in the search results.
+QUICKLOOK_SIZE = 128
 
 # ----------------------------------------------------------------------------------------------------------------------
 # Class: Communicate
 # Description: Defines signals to communicate between the download thread and GUI:
-#   log_signal (str), message_signal (str, str, str), update_button_signal (bool).
+#   message_signal (str, str, str), update_button_signal (bool), products_signal (list),
+#   quicklook_signal (str, str). Log messages go through LogSink instead.
 class Communicate(QObject):
     # Define all signals first
-    log_signal = Signal(str)
     message_signal = Signal(str, str, str)  # title, message, type
     update_button_signal = Signal(bool)     # enable/disable download button
+    products_signal = Signal(list)          # search results
+    quicklook_signal = Signal(str, str)     # product id, quicklook path
 
     # Function: __init__
     # Description: Initialize GUI state, default language, and connect signals.
@@ -39,13 +44,17 @@ class SentinelDownloaderGUI(QWidget):
         super().__init__(parent)
         self.token = None
         self.products_to_download = []
+        self.result_items = {}  # product id -> QListWidgetItem
+        self.quicklook_cache = QuicklookCache()
+        self.pipeline = None  # DownloadProcessPipeline, set by MainApp
         self.comm = Communicate()  # This must come before any signal connections
         self.current_language = "cs"
         
         # Connect signals
-        self.comm.log_signal.connect(self.log)
         self.comm.message_signal.connect(self.show_message)
         self.comm.update_button_signal.connect(self.update_download_button)
+        self.comm.products_signal.connect(self.show_products)
+        self.comm.quicklook_signal.connect(self.set_quicklook)
         
         self.setup_gui()
         self.param_frame.setEnabled(False)
@@ -223,9 +232,30 @@ class SentinelDownloaderGUI(QWidget):
         product_layout.addWidget(self.product_type_combo)
         param_layout.addLayout(product_layout)
 
+        # Pipeline: process each product in the C2RCC tab as soon as it is downloaded
+        self.pipeline_check = QCheckBox(translations[self.current_language]["pipeline_mode"])
+        param_layout.addWidget(self.pipeline_check)
+
+        # Storage: free-space watermark and retention of zip/.SAFE in pipeline mode
+        storage = get_storage_manager()
+        min_free_layout = QHBoxLayout()
+        min_free_layout.setAlignment(Qt.AlignLeft)
+        self.min_free_label = QLabel(translations[self.current_language]["min_free_space"])
+        self.min_free_spin = QSpinBox()
+        self.min_free_spin.setRange(0, 10000)
+        self.min_free_spin.setSuffix(" GB")
+        self.min_free_spin.setValue(storage.min_free_bytes // 1024 ** 3)
+        min_free_layout.addWidget(self.min_free_label)
+        min_free_layout.addWidget(self.min_free_spin)
+        param_layout.addLayout(min_free_layout)
+
+        self.delete_zip_check = QCheckBox(translations[self.current_language]["delete_zip"])
+        self.delete_safe_check = QCheckBox(translations[self.current_language]["delete_safe"])
+        for check in (self.delete_zip_check, self.delete_safe_check):
+            check.setEnabled(False)
+            self.pipeline_check.toggled.connect(check.setEnabled)
+            param_layout.addWidget(check)
 
-
-        
         # Buttons
         self.find_button = QPushButton(translations[self.current_language]["search"])
         self.find_button.clicked.connect(self.run_search_thread)
@@ -237,11 +267,44 @@ class SentinelDownloaderGUI(QWidget):
         param_layout.addWidget(self.download_button)
         
         left_layout.addWidget(self.param_frame)
-        
+
+        # Search results with quicklooks; only checked products are downloaded
+        self.results_group = QGroupBox(translations[self.current_language]["found_products"])
+        results_layout = QVBoxLayout(self.results_group)
+        self.results_list = QListWidget()
+        self.results_list.setIconSize(QSize(QUICKLOOK_SIZE, QUICKLOOK_SIZE))
+        self.results_list.setMinimumHeight(QUICKLOOK_SIZE + 20)
+        results_layout.addWidget(self.results_list)
+        selection_layout = QHBoxLayout()
+        self.select_all_button = QPushButton(translations[self.current_language]["select_all"])
+        self.select_all_button.clicked.connect(lambda: self.set_all_checked(True))
+        self.select_none_button = QPushButton(translations[self.current_language]["select_none"])
+        self.select_none_button.clicked.connect(lambda: self.set_all_checked(False))
+        selection_layout.addWidget(self.select_all_button)
+        selection_layout.addWidget(self.select_none_button)
+        selection_layout.addStretch()
+        results_layout.addLayout(selection_layout)
+        left_layout.addWidget(self.results_group)
+
         # Log
-        self.log_text = QTextEdit()
+        log_level_layout = QHBoxLayout()
+        log_level_layout.setAlignment(Qt.AlignLeft)
+        self.log_level_label = QLabel(translations[self.current_language]["log_level"])
+        self.log_level_combo = QComboBox()
+        for label, level in LEVELS:
+            self.log_level_combo.addItem(label, level)
+        self.log_level_combo.setCurrentIndex(1)
+        log_level_layout.addWidget(self.log_level_label)
+        log_level_layout.addWidget(self.log_level_combo)
+        left_layout.addLayout(log_level_layout)
+
+        self.log_text = QPlainTextEdit()
         self.log_text.setReadOnly(True)
         left_layout.addWidget(self.log_text)
+        self.log_sink = LogSink(self.log_text, "download")
+        self.log_level_combo.currentIndexChanged.connect(
+            lambda: self.log_sink.set_level(self.log_level_combo.currentData())
+        )
         
         layout.addWidget(left_block)
         self.setLayout(layout)
@@ -266,14 +329,22 @@ class SentinelDownloaderGUI(QWidget):
         self.folder_button.setText(translations[lang]["select"])
         self.cloud_label.setText(translations[lang]["cloud_cover"])
         self.product_label.setText(translations[lang]["product_type"])
+        self.pipeline_check.setText(translations[lang]["pipeline_mode"])
+        self.min_free_label.setText(translations[lang]["min_free_space"])
+        self.delete_zip_check.setText(translations[lang]["delete_zip"])
+        self.delete_safe_check.setText(translations[lang]["delete_safe"])
         self.find_button.setText(translations[lang]["search"])
         self.download_button.setText(translations[lang]["download"])
+        self.log_level_label.setText(translations[lang]["log_level"])
+        self.results_group.setTitle(translations[lang]["found_products"])
+        self.select_all_button.setText(translations[lang]["select_all"])
+        self.select_none_button.setText(translations[lang]["select_none"])
         
     # Function: log
-    # Description: Append a status message to the log text area.
-    # Params: message (str).
-    def log(self, message):
-        self.log_text.append(message)
+    # Description: Queue a status message for the log area (thread-safe, flushed in batches).
+    # Params: message (str), level (logging level, default INFO).
+    def log(self, message, level=logging.INFO):
+        self.log_sink.write(message, level)
         
     # Function: show_message
     # Description: Display a popup dialog of given type ('info' or 'error').
@@ -288,16 +359,75 @@ class SentinelDownloaderGUI(QWidget):
     def update_download_button(self, enabled):
         self.download_button.setEnabled(enabled)
 
-    # Function: log
-    # Description: Append a status message to the log text area.
-    # Params: message (str).
+    # Function: show_products
+    # Description: Fill the result list with found products. Cached quicklooks are shown immediately,
+    #   missing ones are fetched concurrently in the interactive pool (not behind running downloads) over one
+    #   shared session.
+    # Params: products (list of OData product dicts).
+    def show_products(self, products):
+        self.results_list.clear()
+        self.result_items = {}
+        scheduler = get_scheduler()
+        session = None
+        for product in products:
+            item = QListWidgetItem(f"{product['Name']}\n{product.get('ContentDate', {}).get('Start', '')[:10]}")
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked)
+            item.setData(Qt.UserRole, product["Id"])
+            self.results_list.addItem(item)
+            self.result_items[product["Id"]] = item
+
+            cached = self.quicklook_cache.get(product["Id"])
+            if cached:
+                self.set_quicklook(product["Id"], cached)
+            else:
+                session = session or cdse_client.create_session(self.token)
+                scheduler.submit(f"Náhled: {product['Name']}", self.fetch_quicklook, product, session,
+                                 resource=INTERACTIVE, priority=PRIORITY_HIGH, key=f"quicklook:{product['Id']}")
+
+    # Function: fetch_quicklook
+    # Description: Job body: download one quicklook into the cache and hand it to the GUI.
+    # Params: job (Job), product (OData product dict), session (requests session shared by the batch).
+    def fetch_quicklook(self, job, product, session):
+        try:
+            path = cdse_client.fetch_quicklook(self.token, product, self.quicklook_cache, job, session)
+        except JobCancelled:
+            raise
+        except Exception as e:
+            self.log(f"Náhled nelze načíst ({product['Name']}): {e}", logging.WARNING)
+            raise
+        if path:
+            self.comm.quicklook_signal.emit(product["Id"], path)
+
+    # Function: set_quicklook
+    # Description: Show a quicklook image as the icon of the product's result item.
+    # Params: product_id (str), path (str).
+    def set_quicklook(self, product_id, path):
+        item = self.result_items.get(product_id)
+        pixmap = QPixmap(path)
+        if item is not None and not pixmap.isNull():
+            item.setIcon(QIcon(pixmap.scaled(QUICKLOOK_SIZE, QUICKLOOK_SIZE, Qt.KeepAspectRatio,
+                                             Qt.SmoothTransformation)))
+
+    # Function: set_all_checked
+    # Description: Check or uncheck all found products.
+    def set_all_checked(self, checked):
+        for i in range(self.results_list.count()):
+            self.results_list.item(i).setCheckState(Qt.Checked if checked else Qt.Unchecked)
+
+    # Function: selected_products
+    # Description: Return the found products whose result item is checked.
+    def selected_products(self):
+        return [p for p in self.products_to_download
+                if p["Id"] in self.result_items and self.result_items[p["Id"]].checkState() == Qt.Checked]
+
     # Function: login
     # Description: Authenticate against Keycloak and enable parameter inputs on success.
     def login(self):
         username = self.username_entry.text()
         password = self.password_entry.text()
         try:
-            token = self.get_keycloak_token(username, password)
+            token = cdse_client.get_keycloak_token(username, password)
             self.token = token
             self.param_frame.setEnabled(True)
 
@@ -308,6 +438,7 @@ class SentinelDownloaderGUI(QWidget):
             )
             self.comm.update_button_signal.emit(False)
             self.products_to_download = []
+            self.comm.products_signal.emit([])
         except Exception as e:
             self.comm.message_signal.emit(
                 translations[self.current_language]["login_error"],
@@ -315,22 +446,6 @@ class SentinelDownloaderGUI(QWidget):
                 "error"
             )
             
-    # Function: get_keycloak_token
-    # Description: Request an access token from Keycloak using provided credentials.
-    def get_keycloak_token(self, username, password):
-        data = {
-            "client_id": "cdse-public",
-            "username": username,
-            "password": password,
-            "grant_type": "password",
-        }
-        r = requests.post(
-            "https://identity.dataspace.copernicus.eu/auth/realms/CDSE/protocol/openid-connect/token",
-            data=data,
-        )
-        r.raise_for_status()
-        return r.json()["access_token"]
-
     # Function: load_shapefile
     # Description: Open shapefile dialog and load its WKT geometry for API queries.
     def load_shapefile(self):
@@ -343,115 +458,58 @@ class SentinelDownloaderGUI(QWidget):
         if folder:
             self.folder_path.setText(folder)
 
-    # Function: get_wkt_from_shapefile
-    # Description: Convert shapefile geometry to WKT via geopandas.
-    def get_wkt_from_shapefile(self, filepath):
-        gdf = gpd.read_file(filepath)
-        self.comm.log_signal.emit(f"Načten shapefile: {filepath}, CRS: {gdf.crs}")
-        if gdf.crs != "EPSG:4326":
-            gdf = gdf.to_crs("EPSG:4326")
-            self.comm.log_signal.emit("Transformace na EPSG:4326 proběhla.")
-        bounds = gdf.total_bounds
-        self.comm.log_signal.emit(f"Vypočtený bounding box: {bounds}")
-        return box(*bounds).wkt
-
     # Function: validate_inputs
     # Description: Ensure mandatory inputs (dates, cloud cover, AOI) are provided.
     def validate_inputs(self):
-        errors = []
-        lang = self.current_language
-
-        # Validate dates
-        for label, entry in [("date_from", self.date_from_entry), ("date_to", self.date_to_entry)]:
-            date_str = entry.text()
-            try:
-                if not re.fullmatch(r"\d{4}-\d{2}-\d{2}", date_str):
-                    raise ValueError("Invalid date format")
-                date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-                if date_obj > datetime.now():
-                    errors.append(f"Datum v poli {label} nesmí být v budoucnosti.")
-            except ValueError:
-                errors.append(f"Neplatný formát datumu v poli {label}. Očekává se YYYY-MM-DD.")
-
-        # Validate date range
-        if not errors:
-            try:
-                date_from = datetime.strptime(self.date_from_entry.text(), "%Y-%m-%d")
-                date_to = datetime.strptime(self.date_to_entry.text(), "%Y-%m-%d")
-                if date_from > date_to:
-                    errors.append("Datum 'Od' nemůže být pozdější než datum 'Do'.")
-            except ValueError:
-                pass  # Already handled above
-
-        # Validate cloud cover
-        cloud_cover = self.cloud_cover_entry.text()
-        try:
-            value = float(cloud_cover.replace(',', '.'))
-            if value < 0 or value > 100:
-                errors.append("Hodnota oblačnosti musí být mezi 0 a 100.")
-        except ValueError:
-            errors.append("Hodnota oblačnosti není platné číslo.")
-
-        # Validate shapefile
-        if not self.shapefile_path.text() or not os.path.exists(self.shapefile_path.text()):
-            errors.append("Neplatný shapefile.")
-
-        # Validate save folder
-        if not self.folder_path.text() or not os.path.isdir(self.folder_path.text()):
-            errors.append("Neplatná výstupní složka.")
-
+        errors = cdse_client.validate_search_params(
+            self.date_from_entry.text(),
+            self.date_to_entry.text(),
+            self.cloud_cover_entry.text(),
+            self.shapefile_path.text(),
+            self.folder_path.text()
+        )
         if errors:
             self.comm.message_signal.emit(
-                translations[lang]["error"],
+                translations[self.current_language]["error"],
                 "\n".join(errors),
                 "error"
             )
             return False
         return True
 
+    # Function: run_search_thread
+    # Description: Validate inputs and queue the search as an interactive job (one search at a time).
     def run_search_thread(self):
         if not self.validate_inputs():
             return
+        if get_scheduler().is_active("search"):
+            self.log("Vyhledávání již probíhá.")
+            return
 
         self.comm.update_button_signal.emit(False)
         self.products_to_download = []
-        threading.Thread(target=self.search_data).start()
+        self.show_products([])
+        search_params = (
+            self.shapefile_path.text(),
+            self.date_from_entry.text(),
+            self.date_to_entry.text(),
+            self.cloud_cover_entry.text(),
+            self.product_type_combo.currentText()
+        )
+        get_scheduler().submit("Vyhledávání Sentinel-2", self.search_data, search_params,
+                               resource=INTERACTIVE, priority=PRIORITY_HIGH, key="search")
 
     # Function: search_data
     # Description: Query Copernicus API for Sentinel-2 products matching parameters.
-    def search_data(self):
+    # Params: job (Job running the search), search_params (tuple shapefile, date_from, date_to, cloud_cover,
+    #   product_type read from the widgets).
+    def search_data(self, job, search_params):
         try:
-            wkt = self.get_wkt_from_shapefile(self.shapefile_path.text())
-            date_from = self.date_from_entry.text()
-            date_to = self.date_to_entry.text()
-            cloud_cover = self.cloud_cover_entry.text()
-            product_type = self.product_type_combo.currentText()
-
-            product_type_code = {
-                "Level-2A": "S2MSI2A",
-                "Level-1C": "S2MSI1C"
-            }.get(product_type, "S2MSI2A")
-
-            url = f"https://catalogue.dataspace.copernicus.eu/odata/v1/Products?" \
-                f"$filter=Collection/Name eq 'SENTINEL-2'" \
-                f" and Attributes/OData.CSC.StringAttribute/any(att:att/Name eq 'productType' and att/OData.CSC.StringAttribute/Value eq '{product_type_code}')" \
-                f" and Attributes/OData.CSC.DoubleAttribute/any(att:att/Name eq 'cloudCover' and att/OData.CSC.DoubleAttribute/Value lt {cloud_cover})" \
-                f" and OData.CSC.Intersects(area=geography'SRID=4326;{wkt}')" \
-                f" and ContentDate/Start gt {date_from}T00:00:00.000Z" \
-                f" and ContentDate/Start lt {date_to}T00:00:00.000Z" \
-                f"&$count=True&$top=100"
-
-            self.comm.log_signal.emit("Odesílám dotaz na API...")
-            session = requests.Session()
-            session.headers.update({"Authorization": f"Bearer {self.token}"})
-
-            response = session.get(url)
-            self.comm.log_signal.emit(f"HTTP status: {response.status_code}")
-            json_ = response.json()
-
-            self.products_to_download = json_.get("value", [])
+            self.products_to_download = cdse_client.search_products(
+                self.token, *search_params, log=self.log
+            )
             if not self.products_to_download:
-                self.comm.log_signal.emit("Žádné produkty nenalezeny.")
+                self.log("Žádné produkty nenalezeny.")
                 self.comm.message_signal.emit(
                     translations[self.current_language]["info"],
                     translations[self.current_language]["no_products"],
@@ -459,13 +517,16 @@ class SentinelDownloaderGUI(QWidget):
                 )
                 return
 
-            self.comm.log_signal.emit(f"Počet nalezených produktů: {len(self.products_to_download)}")
+            self.comm.products_signal.emit(self.products_to_download)
             self.comm.update_button_signal.emit(True)
 
         except Exception as ex:
-            self.comm.log_signal.emit(f"Chyba při vyhledávání: {ex}")
+            self.log(f"Chyba při vyhledávání: {ex}", logging.ERROR)
             self.comm.update_button_signal.emit(False)
 
+    # Function: run_download_thread
+    # Description: Queue one network job per selected product in the shared scheduler.
+    #   Products already queued or downloading are skipped, so repeated clicks do not start a second batch.
     def run_download_thread(self):
         if not self.products_to_download:
             self.comm.message_signal.emit(
@@ -474,44 +535,77 @@ class SentinelDownloaderGUI(QWidget):
                 "error"
             )
             return
-        
-        threading.Thread(target=self.download_data).start()
-
-    # Function: download_data
-    # Description: Download selected products via streaming to output folder.
-    def download_data(self):
-        try:
-            folder = self.folder_path.text()
-            session = requests.Session()
-            session.headers.update({"Authorization": f"Bearer {self.token}"})
-
-            for product in self.products_to_download:
-                try:
-                    prod_id = product["Id"]
-                    prod_name = product["Name"].split(".")[0]
-                    download_url = f"https://catalogue.dataspace.copernicus.eu/odata/v1/Products({prod_id})/$value"
-                    self.comm.log_signal.emit(f"Stahuji: {prod_name}")
-
-                    resp = session.get(download_url, allow_redirects=False)
-                    while resp.status_code in (301, 302, 303, 307):
-                        download_url = resp.headers["Location"]
-                        resp = session.get(download_url, allow_redirects=False)
-
-                    file_resp = session.get(download_url, stream=True)
-                    file_path = os.path.join(folder, f"{prod_name}.zip")
-                    with open(file_path, "wb") as f:
-                        for chunk in file_resp.iter_content(chunk_size=8192):
-                            if chunk:
-                                f.write(chunk)
-                    self.comm.log_signal.emit(f"Uloženo do: {file_path}")
-                except Exception as e:
-                    self.comm.log_signal.emit(f"Chyba při stahování {product['Name']}: {e}")
-
+        products = self.selected_products()
+        if not products:
             self.comm.message_signal.emit(
-                translations[self.current_language]["complete"],
-                translations[self.current_language]["download_complete"],
-                "info"
+                translations[self.current_language]["error"],
+                translations[self.current_language]["no_selected_products"],
+                "error"
             )
+            return
 
-        except Exception as ex:
-            self.comm.log_signal.emit(f"Neočekávaná chyba při stahování: {ex}")
\ No newline at end of file
+        use_pipeline = self.pipeline is not None and self.pipeline_check.isChecked()
+        get_storage_manager().configure(
+            min_free_bytes=self.min_free_spin.value() * 1024 ** 3,
+            delete_zip_after_extract=use_pipeline and self.delete_zip_check.isChecked(),
+            delete_safe_after_process=use_pipeline and self.delete_safe_check.isChecked()
+        )
+        if use_pipeline:
+            if self.product_type_combo.currentText() != "Level-1C":
+                self.comm.message_signal.emit(
+                    translations[self.current_language]["error"],
+                    translations[self.current_language]["pipeline_requires_l1c"],
+                    "error"
+                )
+                return
+            error = self.pipeline.start([product["Name"] for product in products])
+            if error:
+                self.comm.message_signal.emit(
+                    translations[self.current_language]["error"],
+                    translations[self.current_language][error],
+                    "error"
+                )
+                return
+
+        folder = self.folder_path.text()
+        group = JobGroup("download", on_finished=lambda g: self.download_finished(g, use_pipeline))
+        scheduler = get_scheduler()
+        for product in products:
+            job = scheduler.submit(f"Stahování: {product['Name']}", self.download_data,
+                                   product, folder, use_pipeline,
+                                   resource=NETWORK, key=f"download:{product['Id']}", group=group)
+            if job is None:
+                self.log(f"Již ve frontě: {product['Name']}")
+        group.close()
+
+    # Function: download_finished
+    # Description: Report the end of a download batch and close the pipeline batch if used.
+    # Params: group (JobGroup), use_pipeline (bool).
+    def download_finished(self, group, use_pipeline):
+        if use_pipeline:
+            self.pipeline.finish()
+        if not group.jobs:
+            return
+        self.log(f"Staženo {group.count(DONE)} z {len(group.jobs)} produktů.")
+        self.comm.message_signal.emit(
+            translations[self.current_language]["complete"],
+            translations[self.current_language]["download_complete"],
+            "info"
+        )
+
+    # Function: download_data
+    # Description: Job body: download one product via streaming to the output folder.
+    #   In pipeline mode the verified product is handed to the processing queue right away.
+    # Params: job (Job), product (OData product dict), folder (str), use_pipeline (bool).
+    def download_data(self, job, product, folder, use_pipeline=False):
+        log = self.log
+        try:
+            file_path = cdse_client.download_product(self.token, product, folder, job, log)
+            if use_pipeline:
+                log(f"Předáno ke zpracování: {os.path.basename(file_path)}")
+                self.pipeline.submit(file_path, job)
+        except JobCancelled:
+            raise
+        except Exception as e:
+            log(f"Chyba při stahování {product['Name']}: {e}", logging.ERROR)
+            raise
@@ -0,0 +1,123 @@
+# shapefile_reader.py
+# Lightweight pure-Python reader of ESRI shapefile bounds and polygon geometry (search bounding box, AOI polygon).
+# Covers the common case (AOI already in WGS84) without importing geopandas/shapely at all;
+# cdse_client falls back to geopandas when the shapefile has to be reprojected.
+import os
+import re
+import struct
+
+SHAPE_NULL = 0
+POLYGON_TYPES = (5, 15, 25)  # Polygon, PolygonZ, PolygonM
+
+HEADER_SIZE = 100
+FILE_CODE = 9994
+
+
+# Function: read_bounds
+# Description: Read the bounding box stored in the .shp header.
+# Params: path (str, path to .shp).
+# Returns: tuple (xmin, ymin, xmax, ymax).
+def read_bounds(path):
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    _check_header(header, path)
+    return struct.unpack("<4d", header[36:68])
+
+
+# Function: read_prj
+# Description: Return the WKT from the .prj file next to the shapefile, or None if there is none.
+def read_prj(path):
+    prj_path = os.path.splitext(path)[0] + ".prj"
+    if not os.path.exists(prj_path):
+        return None
+    with open(prj_path, encoding="utf-8", errors="replace") as f:
+        return f.read().strip()
+
+
+# Function: is_wgs84
+# Description: Return True if the .prj WKT describes geographic WGS84 coordinates (EPSG:4326).
+# Params: prj_wkt (str or None).
+def is_wgs84(prj_wkt):
+    if not prj_wkt:
+        return False
+    wkt = prj_wkt.upper().replace(" ", "_")
+    return wkt.startswith("GEOGCS[") and ("WGS_1984" in wkt or "WGS_84" in wkt)
+
+
+# Function: looks_geographic
+# Description: Return True if bounds fit into the longitude/latitude range.
+def looks_geographic(bounds):
+    xmin, ymin, xmax, ymax = bounds
+    return -180 <= xmin <= xmax <= 180 and -90 <= ymin <= ymax <= 90
+
+
+# Function: read_polygons
+# Description: Read all polygon records of the shapefile.
+# Params: path (str, path to .shp).
+# Returns: list of polygons, each a list of rings, each ring a list of (x, y) tuples.
+def read_polygons(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    _check_header(data[:HEADER_SIZE], path)
+    shape_type = struct.unpack("<i", data[32:36])[0]
+    if shape_type not in POLYGON_TYPES:
+        raise ValueError(f"Shapefile neobsahuje polygony (typ {shape_type}): {path}")
+
+    polygons = []
+    offset = HEADER_SIZE
+    while offset + 8 <= len(data):
+        content_length = struct.unpack(">i", data[offset + 4:offset + 8])[0] * 2
+        record = data[offset + 8:offset + 8 + content_length]
+        offset += 8 + content_length
+        if struct.unpack("<i", record[:4])[0] == SHAPE_NULL:
+            continue
+        num_parts, num_points = struct.unpack("<2i", record[36:44])
+        parts = struct.unpack(f"<{num_parts}i", record[44:44 + 4 * num_parts])
+        points_start = 44 + 4 * num_parts
+        coords = struct.unpack(f"<{2 * num_points}d", record[points_start:points_start + 16 * num_points])
+        points = list(zip(coords[0::2], coords[1::2]))
+        bounds = list(parts) + [num_points]
+        polygons.append([points[bounds[i]:bounds[i + 1]] for i in range(num_parts)])
+    return polygons
+
+
+# Function: polygons_wkt
+# Description: Return WKT MULTIPOLYGON of polygons from read_polygons. Following the shapefile convention, clockwise
+#   rings are outer boundaries and counterclockwise rings are holes of the preceding outer ring of the same record;
+#   the first ring of a record is always an outer ring (records written with no clockwise ring are whole polygons).
+def polygons_wkt(polygons):
+    shapes = []
+    for rings in polygons:
+        record_shapes = []
+        for ring in rings:
+            if _signed_area(ring) <= 0 or not record_shapes:
+                record_shapes.append([ring])
+            else:
+                record_shapes[-1].append(ring)
+        shapes += record_shapes
+    ring_wkt = lambda ring: "(" + ", ".join(f"{x:.15g} {y:.15g}" for x, y in ring) + ")"
+    return "MULTIPOLYGON (" + ", ".join("(" + ", ".join(ring_wkt(r) for r in shape) + ")" for shape in shapes) + ")"
+
+
+# Function: bbox_wkt
+# Description: Return WKT polygon of a bounding box, with the same vertex order as shapely.geometry.box.
+def bbox_wkt(bounds):
+    xmin, ymin, xmax, ymax = (f"{v:.15g}" for v in bounds)
+    return f"POLYGON (({xmax} {ymin}, {xmax} {ymax}, {xmin} {ymax}, {xmin} {ymin}, {xmax} {ymin}))"
+
+
+# Function: wkt_bounds
+# Description: Return (xmin, ymin, xmax, ymax) of all coordinates in a WKT string.
+def wkt_bounds(wkt):
+    numbers = [float(n) for n in re.findall(r"-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?", wkt)]
+    xs, ys = numbers[0::2], numbers[1::2]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _signed_area(ring):
+    return sum(x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in zip(ring, ring[1:])) / 2
+
+
+def _check_header(header, path):
+    if len(header) < HEADER_SIZE or struct.unpack(">i", header[:4])[0] != FILE_CODE:
+        raise ValueError(f"Neplatný shapefile: {path}")
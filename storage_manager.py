@@ -0,0 +1,187 @@
+# storage_manager.py
+import logging
+import os
+import shutil
+import threading
+import time
+
+from log_util import default_log
+
+_log = default_log("sen2tools.storage")
+
+# Free space (bytes) that must remain on a volume after a transfer/extraction/write; below it work pauses.
+DEFAULT_MIN_FREE_BYTES = 5 * 1024 ** 3
+# How often (s) the free space is re-checked while paused.
+POLL_INTERVAL = 10
+
+
+# Function: path_size
+# Description: Return the size in bytes of a file or of all files below a folder.
+def path_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Class: StorageManager
+# Description: Free-space watermark and retention of downloaded/intermediate data.
+#   Before a download, zip extraction or product write, wait_for_space() checks that the volume keeps at least
+#   min_free_bytes free after the expected amount of data is written; otherwise the calling job pauses (polls)
+#   until space is freed or the job is cancelled, instead of failing mid-write. Retention rules (delete the zip
+#   after extraction, the .SAFE after processing) are applied by the download/process pipeline through
+#   after_extract() and after_process(). Thread-safe; Qt-free.
+class StorageManager:
+    # Function: __init__
+    # Params: min_free_bytes (int, watermark), delete_zip_after_extract (bool), delete_safe_after_process (bool),
+    #   log (optional callable for status messages).
+    def __init__(self, min_free_bytes=DEFAULT_MIN_FREE_BYTES, delete_zip_after_extract=False,
+                 delete_safe_after_process=False, log=None):
+        self.min_free_bytes = min_free_bytes
+        self.delete_zip_after_extract = delete_zip_after_extract
+        self.delete_safe_after_process = delete_safe_after_process
+        self.log = log or _log
+        self._lock = threading.Lock()
+        self._reserved = {}  # volume (st_dev) -> bytes promised to running transfers/writes
+
+    # Function: configure
+    # Description: Update the watermark and retention rules (e.g. from GUI widgets or the CLI job file).
+    def configure(self, min_free_bytes=None, delete_zip_after_extract=None, delete_safe_after_process=None):
+        if min_free_bytes is not None:
+            self.min_free_bytes = int(min_free_bytes)
+        if delete_zip_after_extract is not None:
+            self.delete_zip_after_extract = bool(delete_zip_after_extract)
+        if delete_safe_after_process is not None:
+            self.delete_safe_after_process = bool(delete_safe_after_process)
+
+    # Function: free_bytes
+    # Description: Return the free space of the volume holding path, minus space reserved by running work.
+    def free_bytes(self, path):
+        path = self._existing_parent(path)
+        with self._lock:
+            reserved = self._reserved.get(os.stat(path).st_dev, 0)
+        return shutil.disk_usage(path).free - reserved
+
+    # Function: has_space
+    # Description: Return True if required_bytes can be written to path without crossing the watermark.
+    def has_space(self, path, required_bytes=0):
+        return self.free_bytes(path) - required_bytes >= self.min_free_bytes
+
+    # Function: wait_for_space
+    # Description: Block until required_bytes can be written to path without crossing the watermark, then reserve
+    #   them until release() is called. While waiting the job shows a "disk full" message and stays cancellable.
+    #   Writers report written data with consume(), so bytes already on disk are not counted twice.
+    # Params: path (target file or folder), required_bytes (int, expected size of the data), job (optional Job),
+    #   log (optional callable overriding the manager's log).
+    # Returns: reservation token for consume() and release().
+    def wait_for_space(self, path, required_bytes=0, job=None, log=None):
+        log = log or self.log
+        required_bytes = int(required_bytes or 0)
+        target = self._existing_parent(path)
+        device = os.stat(target).st_dev
+        warned = False
+        while True:
+            with self._lock:
+                free = shutil.disk_usage(target).free - self._reserved.get(device, 0)
+                if free - required_bytes >= self.min_free_bytes:
+                    self._reserved[device] = self._reserved.get(device, 0) + required_bytes
+                    break
+            if not warned:
+                log(f"⏸️ Nedostatek místa na disku ({path}): volno {free / 1024 ** 3:.1f} GB, potřeba "
+                    f"{(required_bytes + self.min_free_bytes) / 1024 ** 3:.1f} GB. Čekám na uvolnění...",
+                    logging.WARNING)
+                warned = True
+                if job is not None:
+                    job.set_progress(job.progress, "disk full")
+            for _ in range(POLL_INTERVAL):
+                if job is not None:
+                    job.checkpoint()
+                time.sleep(1)
+        if warned:
+            log("▶️ Místo na disku uvolněno, pokračuji.")
+            if job is not None:
+                job.set_progress(job.progress, "")
+        return [device, required_bytes]
+
+    # Function: consume
+    # Description: Shrink a reservation by bytes that have been written: they already lower the free space of the
+    #   volume, so keeping them reserved would count them twice.
+    # Params: reservation (token from wait_for_space), written_bytes (int).
+    def consume(self, reservation, written_bytes):
+        with self._lock:
+            self._unreserve(reservation, min(int(written_bytes), reservation[1]))
+
+    # Function: release
+    # Description: Release the rest of the space reserved by wait_for_space() once the data is written (or the work
+    #   failed).
+    def release(self, reservation):
+        with self._lock:
+            self._unreserve(reservation, reservation[1])
+
+    def _unreserve(self, reservation, size):
+        device = reservation[0]
+        reservation[1] -= size
+        self._reserved[device] = max(0, self._reserved.get(device, 0) - size)
+
+    # Function: remove
+    # Description: Delete a file or folder and report the freed space. Errors are logged, not raised.
+    def remove(self, path, log=None):
+        log = log or self.log
+        if not os.path.exists(path):
+            return 0
+        size = path_size(path)
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        except OSError as e:
+            log(f"⚠️ Nelze smazat {path}: {e}", logging.WARNING)
+            return 0
+        log(f"🧹 Smazáno {os.path.basename(path)} ({size / 1024 ** 2:.0f} MB)", logging.DEBUG)
+        return size
+
+    # Function: after_extract
+    # Description: Retention rule: delete the downloaded .zip once it was extracted successfully.
+    def after_extract(self, zip_path, log=None):
+        if self.delete_zip_after_extract:
+            self.remove(zip_path, log)
+
+    # Function: after_process
+    # Description: Retention rule: delete the extracted .SAFE folders once they were processed successfully
+    #   (at least one output was written).
+    def after_process(self, safe_paths, log=None):
+        if self.delete_safe_after_process:
+            for safe_path in safe_paths:
+                self.remove(safe_path, log)
+
+    @staticmethod
+    def _existing_parent(path):
+        path = os.path.abspath(path)
+        while not os.path.exists(path):
+            parent = os.path.dirname(path)
+            if parent == path:
+                break
+            path = parent
+        return path
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+# Function: get_storage_manager
+# Description: Return the process-wide storage manager shared by the downloader, the pipeline and the processor.
+def get_storage_manager():
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            _storage = StorageManager()
+        return _storage
@@ -0,0 +1,63 @@
+# test_cdse_client.py
+# Access token renewal of cdse_client against the local stand-in server benchmarks/mock_cdse.py.
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import cdse_client  # noqa: E402
+from mock_cdse import MockCDSE, MockConfig  # noqa: E402
+from storage_manager import get_storage_manager  # noqa: E402
+
+
+@pytest.fixture
+def mock():
+    mock = MockCDSE(MockConfig(products=2, size_mb=0.1, latency_ms=0, token_ttl=2.0))
+    mock.start()
+    token_url, catalogue_url = cdse_client.TOKEN_URL, cdse_client.CATALOGUE_URL
+    cdse_client.configure_endpoints(mock.token_url, mock.catalogue_url)
+    yield mock
+    cdse_client.configure_endpoints(token_url, catalogue_url)
+    mock.stop()
+
+
+def get_products(session, mock):
+    return cdse_client.request_with_retry(session, "GET", mock.catalogue_url + "/Products")
+
+
+def test_token_is_refreshed_before_it_expires(mock):
+    session = cdse_client.create_session(cdse_client.get_keycloak_token("user", "secret"))
+    assert get_products(session, mock).status_code == 200
+    time.sleep(1.1)  # past expiry minus the margin (half of the 2 s lifetime)
+    assert get_products(session, mock).status_code == 200
+    assert mock.stats["refreshes"] == 1
+    assert mock.stats["rejected"] == 0
+
+
+def test_rejected_token_is_renewed_and_request_repeated(mock):
+    session = cdse_client.create_session(cdse_client.get_keycloak_token("user", "secret"))
+    mock.revoke_tokens()  # the refresh token is gone too: falls back to the password grant
+    assert get_products(session, mock).status_code == 200
+    assert mock.stats["rejected"] == 1
+    assert mock.stats["tokens"] == 2
+
+
+def test_wrong_credentials_are_not_retried(mock):
+    session = cdse_client.create_session(cdse_client.get_keycloak_token("user", "secret"))
+    session.auth._password = ""
+    mock.revoke_tokens()
+    with pytest.raises(Exception):
+        get_products(session, mock)
+    assert mock.stats["rejected"] == 1
+
+
+def test_download_survives_token_expiry(mock, tmp_path):
+    get_storage_manager().configure(min_free_bytes=0)
+    token = cdse_client.get_keycloak_token("user", "secret")
+    mock.revoke_tokens()
+    path = cdse_client.download_product(token, mock.products[0], str(tmp_path))
+    assert os.path.getsize(path) == mock.products[0]["ContentLength"]
+    assert mock.stats["rejected"] == 1
@@ -0,0 +1,160 @@
+# test_job_engine.py
+# Scheduler behaviour: priority ordering, dedupe by key, park/resume of paused queued jobs, cancel while queued or
+# running, group completion and shutdown. Pure Python, no Qt or SNAP needed.
+import threading
+
+import pytest
+
+from job_engine import (JobScheduler, JobGroup, SNAP, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW,
+                        QUEUED, PAUSED, DONE, FAILED, CANCELLED)
+
+TIMEOUT = 5
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = JobScheduler({SNAP: 1})
+    yield scheduler
+    assert scheduler.shutdown(timeout=TIMEOUT)
+
+
+# Function: block_worker
+# Description: Occupy the single SNAP worker until the returned event is set.
+def block_worker(scheduler):
+    started, release = threading.Event(), threading.Event()
+
+    def blocker(job):
+        started.set()
+        while not release.wait(0.01):
+            job.checkpoint()
+
+    job = scheduler.submit("blocker", blocker, resource=SNAP)
+    assert started.wait(TIMEOUT)
+    return job, release
+
+
+def record(job, order, name):
+    order.append(name)
+    return name
+
+
+def test_jobs_run_in_priority_order(scheduler):
+    blocker, release = block_worker(scheduler)
+    order = []
+    jobs = [scheduler.submit(name, record, order, name, resource=SNAP, priority=priority)
+            for name, priority in [("low", PRIORITY_LOW), ("normal", PRIORITY_NORMAL), ("high", PRIORITY_HIGH),
+                                   ("normal2", PRIORITY_NORMAL)]]
+    release.set()
+    assert all(job.wait(TIMEOUT) for job in jobs)
+    assert order == ["high", "normal", "normal2", "low"]
+
+
+def test_duplicate_key_is_rejected_until_finished(scheduler):
+    blocker, release = block_worker(scheduler)
+    first = scheduler.submit("a", record, [], "a", resource=SNAP, key="product")
+    assert scheduler.submit("a again", record, [], "a", resource=SNAP, key="product") is None
+    assert scheduler.is_active("prod")
+    release.set()
+    assert first.wait(TIMEOUT) and first.state == DONE
+    assert scheduler.submit("a later", record, [], "a", resource=SNAP, key="product") is not None
+
+
+def test_paused_queued_job_does_not_hold_the_worker(scheduler):
+    blocker, release = block_worker(scheduler)
+    order = []
+    paused = scheduler.submit("c", record, order, "c", resource=SNAP)
+    other = scheduler.submit("d", record, order, "d", resource=SNAP)
+    paused.pause()
+    assert paused.state == PAUSED
+    release.set()
+    assert other.wait(TIMEOUT) and other.state == DONE
+    assert not paused.wait(0.2)
+    assert paused.state == PAUSED and paused.started_at is None
+
+    paused.resume()
+    assert paused.wait(TIMEOUT) and paused.state == DONE
+    assert order == ["d", "c"]
+
+
+def test_pause_and_resume_before_pickup_runs_once(scheduler):
+    blocker, release = block_worker(scheduler)
+    order = []
+    job = scheduler.submit("c", record, order, "c", resource=SNAP)
+    job.pause()
+    job.resume()
+    assert job.state == QUEUED
+    release.set()
+    assert job.wait(TIMEOUT)
+    assert order == ["c"]
+
+
+def test_cancel_queued_job_finishes_it_immediately(scheduler):
+    blocker, release = block_worker(scheduler)
+    fired = threading.Event()
+    group = JobGroup("batch", on_finished=lambda _: fired.set())
+    order = []
+    job = scheduler.submit("c", record, order, "c", resource=SNAP, key="product", group=group)
+    group.close()
+    job.cancel()
+    assert job.state == CANCELLED and job.wait(0)
+    assert fired.is_set()
+    again = scheduler.submit("c again", record, order, "c", resource=SNAP, key="product")
+    assert again is not None
+    release.set()
+    assert again.wait(TIMEOUT)
+    assert order == ["c"]  # only the resubmitted job ran
+
+
+def test_cancel_parked_job(scheduler):
+    blocker, release = block_worker(scheduler)
+    job = scheduler.submit("c", record, [], "c", resource=SNAP)
+    job.pause()
+    release.set()
+    assert blocker.wait(TIMEOUT)
+    job.cancel()
+    assert job.state == CANCELLED
+
+
+def test_cancel_running_job_stops_at_checkpoint(scheduler):
+    blocker, release = block_worker(scheduler)
+    blocker.cancel()
+    assert blocker.wait(TIMEOUT) and blocker.state == CANCELLED
+
+
+def test_failing_job_records_error(scheduler):
+    def fail(job):
+        raise ValueError("boom")
+
+    job = scheduler.submit("fail", fail, resource=SNAP)
+    assert job.wait(TIMEOUT)
+    assert job.state == FAILED and isinstance(job.error, ValueError) and job.message == "boom"
+
+
+def test_group_fires_once_after_close_and_all_jobs(scheduler):
+    blocker, release = block_worker(scheduler)
+    calls = []
+    group = JobGroup("batch", on_finished=calls.append)
+    jobs = [scheduler.submit(str(i), record, [], i, resource=SNAP, group=group) for i in range(3)]
+    release.set()
+    assert all(job.wait(TIMEOUT) for job in jobs)
+    assert calls == [] and not group.is_finished()
+    group.close()
+    group.close()
+    assert calls == [group] and group.is_finished()
+    assert group.count(DONE) == 3
+
+
+def test_empty_group_fires_on_close():
+    calls = []
+    group = JobGroup("empty", on_finished=calls.append)
+    group.add(None)
+    group.close()
+    assert calls == [group]
+
+
+def test_shutdown_cancels_queued_jobs_and_stops_workers():
+    scheduler = JobScheduler({SNAP: 1})
+    blocker, release = block_worker(scheduler)
+    queued = scheduler.submit("c", record, [], "c", resource=SNAP)
+    assert scheduler.shutdown(timeout=TIMEOUT)
+    assert blocker.state == CANCELLED and queued.state == CANCELLED
@@ -0,0 +1,44 @@
+# test_shapefile_reader.py
+# Assembly of shapefile polygon records into WKT (shapefile_reader.polygons_wkt).
+import pytest
+
+from shapefile_reader import polygons_wkt
+
+# Clockwise (outer) and counterclockwise (hole) rings, closed as in a .shp record.
+OUTER = [(0, 0), (0, 10), (10, 10), (10, 0), (0, 0)]
+HOLE = [(2, 2), (4, 2), (4, 4), (2, 4), (2, 2)]
+FAR_OUTER = [(20, 0), (20, 10), (30, 10), (30, 0), (20, 0)]
+FAR_CCW = [(20, 0), (30, 0), (30, 10), (20, 10), (20, 0)]
+
+
+def polygon_count(wkt):
+    return wkt.count("((")
+
+
+def test_hole_stays_in_its_record():
+    wkt = polygons_wkt([[OUTER, HOLE]])
+    assert polygon_count(wkt) == 1
+    assert wkt == "MULTIPOLYGON (((0 0, 0 10, 10 10, 10 0, 0 0), (2 2, 4 2, 4 4, 2 4, 2 2)))"
+
+
+def test_counterclockwise_record_is_not_a_hole_of_the_previous_record():
+    wkt = polygons_wkt([[OUTER], [FAR_CCW]])
+    assert polygon_count(wkt) == 2
+    assert wkt.endswith("((20 0, 30 0, 30 10, 20 10, 20 0)))")
+
+
+def test_records_without_clockwise_rings_are_polygons():
+    wkt = polygons_wkt([[list(reversed(OUTER))], [FAR_CCW]])
+    assert polygon_count(wkt) == 2
+
+
+@pytest.mark.parametrize("records", [
+    [[OUTER, HOLE], [FAR_OUTER]],
+    [[OUTER], [FAR_CCW]],
+    [[list(reversed(OUTER))], [FAR_CCW]],
+])
+def test_result_is_valid_geometry(records):
+    shapely_wkt = pytest.importorskip("shapely.wkt")
+    geometry = shapely_wkt.loads(polygons_wkt(records))
+    assert geometry.is_valid
+    assert len(geometry.geoms) == len(records)
@@ -0,0 +1,30 @@
+# test_storage_manager.py
+# Space reservations of storage_manager.StorageManager.
+import os
+
+from storage_manager import StorageManager
+
+
+def reserved(storage, path):
+    return storage._reserved.get(os.stat(path).st_dev, 0)
+
+
+def test_written_bytes_are_not_reserved_twice(tmp_path):
+    storage = StorageManager(min_free_bytes=0)
+    reservation = storage.wait_for_space(str(tmp_path), 1000)
+    assert reserved(storage, tmp_path) == 1000
+    storage.consume(reservation, 400)
+    assert reserved(storage, tmp_path) == 600
+    storage.release(reservation)
+    assert reserved(storage, tmp_path) == 0
+
+
+def test_consume_beyond_the_reservation_leaves_other_reservations(tmp_path):
+    storage = StorageManager(min_free_bytes=0)
+    first = storage.wait_for_space(str(tmp_path), 100)
+    second = storage.wait_for_space(str(tmp_path), 500)
+    storage.consume(first, 300)  # more than the size expected
+    assert reserved(storage, tmp_path) == 500
+    storage.release(first)
+    storage.release(second)
+    assert reserved(storage, tmp_path) == 0
@@ -0,0 +1,65 @@
+# tile_grouping.py
+# Grouping of Sentinel-2 products acquired in the same datatake (same satellite, sensing start and relative orbit).
+# Tiles of one datatake that together cover an AOI are mosaicked into a single C2RCC input (see
+# c2rcc_core.process_group), so the overlap strip is processed once and there is one output per AOI and date.
+import os
+import re
+
+# S2A_MSIL1C_20230615T100031_N0509_R122_T33UVR_20230615T120000(.SAFE|.zip)
+SAFE_NAME_RE = re.compile(
+    r"^(?P<mission>S2[A-D])_(?P<level>MSIL1C|MSIL2A)_(?P<sensing>\d{8}T\d{6})_N(?P<baseline>\d{4})"
+    r"_R(?P<orbit>\d{3})_T(?P<tile>[0-9A-Z]{5})_(?P<generated>\d{8}T\d{6})"
+)
+
+
+# Function: parse_product_name
+# Description: Parse a Sentinel-2 product name or path (.SAFE folder, .zip or bare name).
+# Returns: dict with mission, level, sensing, date, baseline, orbit, tile, generated, name and path; None if the
+#   name does not follow the Sentinel-2 naming convention.
+def parse_product_name(path):
+    name = os.path.basename(os.path.normpath(path))
+    match = SAFE_NAME_RE.match(name)
+    if not match:
+        return None
+    info = match.groupdict()
+    info["date"] = info["sensing"][:8]
+    info["name"] = name
+    info["path"] = path
+    return info
+
+
+# Function: datatake_key
+# Description: Return the grouping key of a product (mission, sensing start, relative orbit), or the product name
+#   itself when it cannot be parsed (such products are never grouped).
+def datatake_key(path):
+    info = parse_product_name(path)
+    if info is None:
+        return os.path.basename(os.path.normpath(path))
+    return info["mission"], info["sensing"], info["orbit"]
+
+
+# Function: group_products
+# Description: Group product paths by datatake; groups and their members are sorted by sensing time and tile.
+# Params: paths (iterable of .SAFE/.zip paths).
+# Returns: list of lists of paths.
+def group_products(paths):
+    groups = {}
+    for path in paths:
+        groups.setdefault(datatake_key(path), []).append(path)
+    ordered = sorted(groups.values(), key=lambda members: os.path.basename(os.path.normpath(members[0])))
+    return [sorted(members, key=lambda p: os.path.basename(os.path.normpath(p))) for members in ordered]
+
+
+# Function: group_output_name
+# Description: Name of the AOI-clipped output of a group (or of a single product) for the given AOI, e.g.
+#   S2A_MSIL1C_20230615T100031_R122_lake_C2RCC. With per_tile (tiles of a datatake processed separately) the tile
+#   is part of the name: S2A_MSIL1C_20230615T100031_R122_T33UVR_lake_C2RCC. Falls back to "<first product>_C2RCC"
+#   for unparseable names.
+# Params: paths (list of group member paths), aoi_path (shapefile path), per_tile (bool).
+def group_output_name(paths, aoi_path, per_tile=False):
+    info = parse_product_name(paths[0])
+    if info is None:
+        return os.path.splitext(os.path.basename(os.path.normpath(paths[0])))[0] + "_C2RCC"
+    aoi_name = os.path.splitext(os.path.basename(aoi_path))[0]
+    tile = f"_T{info['tile']}" if per_tile else ""
+    return f"{info['mission']}_{info['level']}_{info['sensing']}_R{info['orbit']}{tile}_{aoi_name}_C2RCC"
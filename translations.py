@@ -4,6 +4,7 @@ translations = {
         "app_title": "🛰️ Mapstron - Sen2tools",
         "download_tab": "📥 Download Sentinel-2",
         "process_tab": "🌊 C2RCC Processing",
+        "jobs_tab": "⚙️ Jobs",
         # SentinelDownloaderGUI
         "parameters": "Parameters",
         "username": "Username:",
@@ -24,6 +25,16 @@ translations = {
         "login_error": "Login error",
         "no_products": "No products found for given parameters.",
         "download_complete": "Download complete.",
+        "found_products": "Found products (only checked ones are downloaded)",
+        "select_all": "Select all",
+        "select_none": "Select none",
+        "no_selected_products": "No products selected for download.",
+        "pipeline_mode": "Process with C2RCC right after download (settings from the C2RCC tab)",
+        "min_free_space": "Pause when free disk space drops below:",
+        "delete_zip": "Delete the downloaded .zip after extraction",
+        "delete_safe": "Delete the extracted .SAFE after successful processing",
+        "pipeline_requires_l1c": "Processing after download requires Level-1C products.",
+        "pipeline_busy": "Processing of the previous batch is still running.",
         # C2RCCProcessorGUI
         "input_folder": "Input folder (.SAFE):",
         "output_folder": "Output folder:",
@@ -36,16 +47,42 @@ translations = {
         "kd": "Kd",
         "unc": "Uncertainty",
         "total": "Total concentrations",
+        "mosaic": "Mosaic tiles of the same overpass into one output per AOI and date (requires shapefile)",
+        "resolution": "Resolution:",
+        "triage": "Preview check at 60 m first, process in full only if at least this share of the AOI is usable:",
+        "min_valid_fraction": "Minimum share of valid water pixels (no cloud risk) in the AOI",
         "process": "🚀 Run processing",
         "error": "Error",
+        "info": "Information",
+        "log_level": "Log level:",
         "invalid_input": "Invalid input folder.",
+        "invalid_output": "Invalid output folder.",
         "complete": "Complete",
-        "processing_complete": "Processing complete."
+        "processing_complete": "Processing complete.",
+        "processing_failed": "Processing finished with errors: {failed} failed, {cancelled} cancelled, {done} of {total} done.",
+        # JobQueueGUI
+        "job_name": "Job",
+        "job_resource": "Resource",
+        "job_priority": "Priority",
+        "job_state": "State",
+        "job_progress": "Progress",
+        "job_pause": "⏸️ Pause",
+        "job_resume": "▶️ Resume",
+        "job_cancel": "⏹️ Cancel",
+        "job_cancel_all": "Cancel all",
+        "job_clear": "Clear finished",
+        "job_state_queued": "queued",
+        "job_state_running": "running",
+        "job_state_paused": "paused",
+        "job_state_done": "done",
+        "job_state_failed": "failed",
+        "job_state_cancelled": "cancelled"
     },
     "cs": {
         "app_title": "🛰️ Mapstron - Sen2tools",
         "download_tab": "📥 Stahování Sentinel-2",
         "process_tab": "🌊 Zpracování C2RCC",
+        "jobs_tab": "⚙️ Úlohy",
         # SentinelDownloaderGUI
         "parameters": "Parametry",
         "username": "Uživatelské jméno:",
@@ -66,6 +103,16 @@ translations = {
         "login_error": "Chyba přihlášení",
         "no_products": "Nebyly nalezeny žádné produkty pro dané parametry.",
         "download_complete": "Stažení dokončeno.",
+        "found_products": "Nalezené produkty (stahují se jen zaškrtnuté)",
+        "select_all": "Vybrat vše",
+        "select_none": "Zrušit výběr",
+        "no_selected_products": "Není vybrán žádný produkt ke stažení.",
+        "pipeline_mode": "Zpracovat C2RCC ihned po stažení (nastavení z karty C2RCC)",
+        "min_free_space": "Pozastavit při volném místě na disku pod:",
+        "delete_zip": "Po rozbalení smazat stažený .zip",
+        "delete_safe": "Po úspěšném zpracování smazat rozbalený .SAFE",
+        "pipeline_requires_l1c": "Zpracování po stažení vyžaduje produkty Level-1C.",
+        "pipeline_busy": "Zpracování předchozí dávky stále běží.",
         # C2RCCProcessorGUI
         "input_folder": "Vstupní složka (.SAFE):",
         "output_folder": "Výstupní složka:",
@@ -78,10 +125,35 @@ translations = {
         "kd": "Kd",
         "unc": "Uncertainty",
         "total": "Total concentrations",
+        "mosaic": "Spojit dlaždice ze stejného přeletu do jednoho výstupu pro AOI a datum (vyžaduje shapefile)",
+        "resolution": "Rozlišení:",
+        "triage": "Nejprve náhledová kontrola v 60 m, plně zpracovat jen při podílu použitelné plochy AOI alespoň:",
+        "min_valid_fraction": "Minimální podíl platných vodních pixelů (bez rizika oblačnosti) v AOI",
         "process": "🚀 Spustit zpracování",
         "error": "Chyba",
+        "info": "Informace",
+        "log_level": "Úroveň logu:",
         "invalid_input": "Neplatná vstupní složka.",
+        "invalid_output": "Neplatná výstupní složka.",
         "complete": "Hotovo",
-        "processing_complete": "Zpracování dokončeno."
+        "processing_complete": "Zpracování dokončeno.",
+        "processing_failed": "Zpracování skončilo s chybami: {failed} selhalo, {cancelled} zrušeno, hotovo {done} z {total}.",
+        # JobQueueGUI
+        "job_name": "Úloha",
+        "job_resource": "Prostředek",
+        "job_priority": "Priorita",
+        "job_state": "Stav",
+        "job_progress": "Průběh",
+        "job_pause": "⏸️ Pozastavit",
+        "job_resume": "▶️ Pokračovat",
+        "job_cancel": "⏹️ Zrušit",
+        "job_cancel_all": "Zrušit vše",
+        "job_clear": "Smazat dokončené",
+        "job_state_queued": "ve frontě",
+        "job_state_running": "běží",
+        "job_state_paused": "pozastaveno",
+        "job_state_done": "hotovo",
+        "job_state_failed": "chyba",
+        "job_state_cancelled": "zrušeno"
     }
 }
\ No newline at end of file